@@ -0,0 +1,309 @@
+"""
+Answer many degrees queries in one run.
+
+Reads (source, target) pairs from a CSV file with `source` and `target`
+columns or from a JSONL file of {"source": ..., "target": ...} objects.
+Each endpoint may be a person id or an unambiguous name. Results are
+written as JSONL, one line per query, in input order.
+
+People who appear in several of the remaining queries get a full
+breadth-first search tree, kept in a least-recently-used cache with a memory cap, so every
+later query touching them is answered by walking parent pointers.
+
+With --workers, queries are sharded across processes by their most
+frequent endpoint, so each person's queries share one worker's cache.
+Workers memory-map the same snapshot instead of receiving a pickled
+graph, so the operating system shares its pages between them.
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import queue
+import sys
+import time
+from collections import Counter, OrderedDict
+
+import degrees
+
+CACHE_MB = 256
+SCALING = (1, 2, 4, 8)
+
+# Results are sent back from workers in lists of this many records
+RESULT_CHUNK = 64
+
+# Seconds between checks that no worker has died while waiting for results
+WORKER_POLL = 1
+
+# Remaining queries an endpoint needs before a full search tree pays off
+TREE_THRESHOLD = 4
+
+
+class TreeCache():
+    """
+    Least-recently-used cache of SearchTrees keyed by root person index,
+    evicting old trees once their total size exceeds `max_bytes`.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.trees = OrderedDict()
+
+    def get(self, p):
+        tree = self.trees.get(p)
+        if tree is not None:
+            self.trees.move_to_end(p)
+        return tree
+
+    def add(self, tree):
+        self.trees[tree.source] = tree
+        self.nbytes += tree.nbytes()
+        while self.nbytes > self.max_bytes and len(self.trees) > 1:
+            _, evicted = self.trees.popitem(last=False)
+            self.nbytes -= evicted.nbytes()
+
+    def invalidate(self, people):
+        """
+        Evicts every tree that reaches any of the person indices in `people`.
+        """
+        for root, tree in list(self.trees.items()):
+            if any(tree.reaches(p) for p in people):
+                del self.trees[root]
+                self.nbytes -= tree.nbytes()
+
+
+def read_pairs(path):
+    """
+    Returns a list of (source, target) strings read from a CSV or JSONL file.
+    """
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl") or path.endswith(".json"):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        return [(str(row["source"]), str(row["target"])) for row in rows]
+
+
+def resolve(graph, value):
+    """
+    Returns the person index for a person id or an unambiguous name.
+    Raises ValueError if there is no such person or the name is ambiguous.
+    """
+    p = graph.person_index.get(value)
+    if p is not None:
+        return p
+    matches = graph.name_index.all(value.lower())
+    if len(matches) == 1:
+        return matches[0]
+    if not matches:
+        raise ValueError(f"person not found: {value}")
+    raise ValueError(f"ambiguous name: {value}")
+
+
+def answer(graph, cache, counts, s, t):
+    """
+    Returns the path from person index `s` to `t` and whether a cached
+    search tree answered it. Trees are built for endpoints with at least
+    TREE_THRESHOLD queries still to come; other queries use the
+    bidirectional search.
+    """
+    tree = cache.get(s)
+    if tree is not None:
+        return tree.path_to(t), True
+    tree = cache.get(t)
+    if tree is not None:
+        return tree.path_from(s), True
+
+    root = s if counts[s] >= counts[t] else t
+    if counts[root] >= TREE_THRESHOLD:
+        tree = graph.search_tree(root)
+        cache.add(tree)
+        if root == s:
+            return tree.path_to(t), False
+        return tree.path_from(s), False
+
+    return graph.shortest_path(graph.person_ids[s], graph.person_ids[t]), False
+
+
+def run_batch(graph, pairs, cache):
+    """
+    Yields one result dictionary per (source, target) pair.
+    """
+    resolved = []
+    for source, target in pairs:
+        try:
+            resolved.append((resolve(graph, source), resolve(graph, target)))
+        except ValueError as e:
+            resolved.append(e)
+    counts = Counter()
+    for pair in resolved:
+        if not isinstance(pair, ValueError):
+            counts.update(set(pair))
+
+    for (source, target), pair in zip(pairs, resolved):
+        record = {"source": source, "target": target}
+        if isinstance(pair, ValueError):
+            record["error"] = str(pair)
+            yield record
+            continue
+
+        start = time.perf_counter()
+        path, cached = answer(graph, cache, counts, *pair)
+        record["ms"] = round(1000 * (time.perf_counter() - start), 3)
+        counts.subtract(set(pair))
+        record["cached"] = cached
+        record["degrees"] = None if path is None else len(path)
+        record["path"] = path
+        yield record
+
+
+def shard_pairs(graph, pairs, workers):
+    """
+    Splits `pairs` into one list of (index, pair) tasks per worker,
+    keyed on each query's most frequent endpoint.
+    """
+    keys = []
+    for source, target in pairs:
+        try:
+            keys.append((resolve(graph, source), resolve(graph, target)))
+        except ValueError:
+            keys.append(())
+    counts = Counter()
+    for key in keys:
+        counts.update(set(key))
+
+    shards = [[] for _ in range(workers)]
+    for index, (pair, key) in enumerate(zip(pairs, keys)):
+        root = max(key, key=counts.__getitem__, default=0)
+        shards[root % workers].append((index, pair))
+    return shards
+
+
+def worker(directory, max_bytes, tasks, results):
+    """
+    Answers `tasks` against the memory-mapped snapshot of `directory`,
+    putting lists of (index, record) on `results` and then None. The
+    None is put even if answering fails, so the parent never waits on
+    a worker that has stopped.
+    """
+    try:
+        graph = degrees.load_graph(directory)
+        cache = TreeCache(max_bytes)
+        indices = [index for index, _ in tasks]
+        pairs = [pair for _, pair in tasks]
+
+        chunk = []
+        for index, record in zip(indices, run_batch(graph, pairs, cache)):
+            chunk.append((index, record))
+            if len(chunk) == RESULT_CHUNK:
+                results.put(chunk)
+                chunk = []
+        if chunk:
+            results.put(chunk)
+    finally:
+        results.put(None)
+
+
+def check_workers(processes):
+    """
+    Raises RuntimeError if any of `processes` has exited with an error.
+    """
+    for process in processes:
+        if process.exitcode not in (None, 0):
+            raise RuntimeError(
+                f"batch worker {process.pid} exited with code {process.exitcode}"
+            )
+
+
+def run_parallel(directory, graph, pairs, workers, max_bytes):
+    """
+    Yields one result dictionary per pair, in input order, computed by
+    `workers` processes that share `max_bytes` of tree cache between them.
+    Raises RuntimeError if a worker fails or is killed.
+    """
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=worker,
+            args=(directory, max_bytes // workers, tasks, results)
+        )
+        for tasks in shard_pairs(graph, pairs, workers)
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        pending = {}
+        next_index = 0
+        running = len(processes)
+        while running:
+            try:
+                chunk = results.get(timeout=WORKER_POLL)
+            except queue.Empty:
+                # A killed worker never puts its None
+                check_workers(processes)
+                continue
+            if chunk is None:
+                running -= 1
+                continue
+            pending.update(chunk)
+            while next_index in pending:
+                yield pending.pop(next_index)
+                next_index += 1
+
+        for process in processes:
+            process.join()
+        check_workers(processes)
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer degrees queries in bulk.")
+    parser.add_argument("directory")
+    parser.add_argument("pairs", help="CSV or JSONL file of source/target pairs")
+    parser.add_argument("--output", help="JSONL output file (default: stdout)")
+    parser.add_argument("--cache-mb", type=float, default=CACHE_MB,
+                        help="memory cap for cached search trees")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes")
+    parser.add_argument("--scaling", action="store_true",
+                        help=f"report throughput at {SCALING} workers instead")
+    args = parser.parse_args()
+
+    graph = degrees.load_graph(args.directory)
+    pairs = read_pairs(args.pairs)
+    max_bytes = int(args.cache_mb * 2 ** 20)
+
+    if args.scaling:
+        baseline = None
+        for workers in SCALING:
+            start = time.perf_counter()
+            for _ in run_parallel(args.directory, graph, pairs, workers, max_bytes):
+                pass
+            rate = len(pairs) / (time.perf_counter() - start)
+            baseline = baseline or rate
+            print(f"{workers} workers: {rate:.1f} queries/s "
+                  f"({rate / baseline:.2f}x)")
+        return
+
+    if args.workers > 1:
+        records = run_parallel(args.directory, graph, pairs, args.workers, max_bytes)
+    else:
+        records = run_batch(graph, pairs, TreeCache(max_bytes))
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        for record in records:
+            out.write(json.dumps(record) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+Benchmarks for the degrees searches on generated co-star graphs.
+
+Usage: python benchmark.py [people | directory ...]
+       python benchmark.py frontiers
+"""
+
+import os
+import random
+import sys
+import time
+
+import degrees
+import weighted
+from graph import Graph
+from landmarks import LandmarkIndex
+from util import Node, PriorityFrontier, QueueFrontier, StackFrontier
+
+QUERIES = 20
+LANDMARKS = 8
+FRONTIER_SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6)
+FRONTIER_OPERATIONS = 100
+BASELINE_BUDGET = 60
+CAST_SIZE = (3, 6)
+
+
+def generate_graph(n, seed=0):
+    """
+    Fill the degrees data model with a random graph of `n` people.
+    Casts are drawn with a bias towards low ids so that, like the IMDb
+    data, a few people appear in many movies and most in only a few.
+    """
+    rng = random.Random(seed)
+    degrees.names.clear()
+    degrees.people.clear()
+    degrees.movies.clear()
+
+    for i in range(n):
+        person_id = str(i)
+        degrees.people[person_id] = {
+            "name": f"Person {i}",
+            "birth": str(1900 + i % 100),
+            "movies": set()
+        }
+        degrees.names[f"person {i}"] = {person_id}
+
+    for i in range(n // 3):
+        movie_id = str(i)
+        stars = set()
+        for _ in range(rng.randint(*CAST_SIZE)):
+            stars.add(str(int(n * rng.random() ** 2)))
+        degrees.movies[movie_id] = {
+            "title": f"Movie {i}",
+            "year": str(1900 + i % 120),
+            "stars": stars
+        }
+        for person_id in stars:
+            degrees.people[person_id]["movies"].add(movie_id)
+
+
+def random_pairs(count, seed=1):
+    """
+    Returns `count` random (source, target) pairs of people with movies.
+    """
+    rng = random.Random(seed)
+    cast = [p for p, person in degrees.people.items() if person["movies"]]
+    return [(rng.choice(cast), rng.choice(cast)) for _ in range(count)]
+
+
+def run(search, pairs, budget=None):
+    """
+    Times `search` over `pairs`, stopping early once `budget` seconds
+    have passed. Returns a list of (seconds, path length) per query.
+    """
+    results = []
+    start = time.perf_counter()
+    for source, target in pairs:
+        if budget is not None and time.perf_counter() - start > budget:
+            break
+        t = time.perf_counter()
+        path = search(source, target)
+        results.append((time.perf_counter() - t, None if path is None else len(path)))
+    return results
+
+
+def weighted_paths(search, landmarks=None):
+    """
+    Adapts a WeightedSearch to return only the path, as `run` expects.
+    """
+    def shortest_path(source, target):
+        result = search.shortest_path(source, target, landmarks)
+        return None if result is None else result[1]
+    return shortest_path
+
+
+def deep_sizeof(obj, seen=None):
+    """
+    Returns the approximate number of bytes used by `obj` and
+    everything it references through dicts, sets, lists and tuples.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += deep_sizeof(key, seen) + deep_sizeof(value, seen)
+    elif isinstance(obj, (set, frozenset, list, tuple)):
+        for item in obj:
+            size += deep_sizeof(item, seen)
+    return size
+
+
+def expansion_rate(expand, people, seconds=2):
+    """
+    Returns the number of neighbours per second produced by calling
+    `expand` on each of `people` in turn.
+    """
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for p in people:
+            count += expand(p)
+    return count / (time.perf_counter() - start)
+
+
+def compare_layouts(graph, sample):
+    """
+    Prints memory use and neighbour-expansion throughput of the
+    dict-of-sets layout against the CSR graph.
+    """
+    adjacency = {
+        person_id: person["movies"] for person_id, person in degrees.people.items()
+    }, {
+        movie_id: movie["stars"] for movie_id, movie in degrees.movies.items()
+    }
+    print(f"  dict-of-sets   {deep_sizeof(adjacency) / 2 ** 20:.1f} MiB adjacency")
+    print(f"  csr            {graph.nbytes() / 2 ** 20:.1f} MiB adjacency")
+
+    def expand_dict(person_id):
+        return len(degrees.neighbors_for_person(person_id))
+
+    def expand_csr(p):
+        count = 0
+        for m in graph.movies_of(p):
+            count += len(graph.stars_of(m))
+        return count
+
+    rate = expansion_rate(expand_dict, sample)
+    print(f"  dict-of-sets   {rate / 1e6:.2f} M neighbours/s")
+    rate = expansion_rate(expand_csr, [graph.person_index[p] for p in sample])
+    print(f"  csr            {rate / 1e6:.2f} M neighbours/s")
+
+
+class ListStackFrontier():
+    """
+    The original list-backed frontier, kept for comparison.
+    """
+
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        node = self.frontier[-1]
+        self.frontier = self.frontier[:-1]
+        return node
+
+
+class ListQueueFrontier(ListStackFrontier):
+
+    def remove(self):
+        node = self.frontier[0]
+        self.frontier = self.frontier[1:]
+        return node
+
+
+def frontier_costs(make, size, operations=FRONTIER_OPERATIONS):
+    """
+    Returns the mean seconds per remove/add pair and per contains_state
+    call on a frontier from `make()` holding `size` nodes.
+    """
+    frontier = make()
+    for i in range(size):
+        frontier.add(Node(state=i, parent=None, action=None))
+
+    start = time.perf_counter()
+    for i in range(operations):
+        frontier.add(Node(state=size + i, parent=None, action=None))
+        frontier.remove()
+    churn = (time.perf_counter() - start) / operations
+
+    start = time.perf_counter()
+    for i in range(operations):
+        frontier.contains_state(-i)
+    lookup = (time.perf_counter() - start) / operations
+    return churn, lookup
+
+
+def compare_frontiers():
+    """
+    Prints per-operation costs of the list-backed and current frontiers.
+    """
+    frontiers = [
+        ("list stack", ListStackFrontier),
+        ("list queue", ListQueueFrontier),
+        ("stack", StackFrontier),
+        ("queue", QueueFrontier),
+        ("priority", lambda: PriorityFrontier(key=lambda node: -node.state)),
+    ]
+    for size in FRONTIER_SIZES:
+        print(f"Frontier of {size} nodes:")
+        for label, make in frontiers:
+            churn, lookup = frontier_costs(make, size)
+            print(f"  {label:<16} add+remove {1e6 * churn:.2f} us, "
+                  f"contains_state {1e6 * lookup:.2f} us")
+
+
+def report(label, results):
+    if not results:
+        print(f"  {label:<16} no queries completed")
+        return
+    times = sorted(t for t, _ in results)
+    total = sum(times)
+    print(f"  {label:<16} {len(results)} queries, "
+          f"mean {1000 * total / len(times):.1f} ms, "
+          f"median {1000 * times[len(times) // 2]:.1f} ms, "
+          f"max {1000 * times[-1]:.1f} ms")
+
+
+def main():
+    if sys.argv[1:] == ["frontiers"]:
+        compare_frontiers()
+        return
+
+    for arg in sys.argv[1:] or [10 ** 5, 10 ** 6]:
+        if os.path.isdir(str(arg)):
+            print(f"Loading {arg}...")
+            for data in (degrees.names, degrees.people, degrees.movies):
+                data.clear()
+            degrees.load_data(arg)
+        else:
+            print(f"Generating graph with {arg} people...")
+            generate_graph(int(arg))
+        graph = Graph.from_data(degrees.people, degrees.movies)
+        pairs = random_pairs(QUERIES)
+
+        print(f"{len(degrees.people)} people, {len(degrees.movies)} movies")
+        compare_layouts(graph, [source for source, _ in pairs])
+        fast = run(degrees.bidirectional_search, pairs)
+        report("bidirectional", fast)
+        report("csr", run(graph.shortest_path, pairs))
+
+        index = LandmarkIndex.build(graph, LANDMARKS)
+        report("landmarks", run(index.shortest_path, pairs))
+        exact = 0
+        for source, target in pairs:
+            lower, upper = index.bounds(graph.person_index[source], graph.person_index[target])
+            exact += lower == upper
+        print(f"  {'':<16} {exact}/{len(pairs)} separations fixed by bounds alone")
+
+        for weight in weighted.WEIGHTS:
+            search = weighted.WeightedSearch(graph, weight)
+            search.movie_costs()
+            report(f"dijkstra/{weight}", run(weighted_paths(search), pairs))
+        search = weighted.WeightedSearch(graph, "recent")
+        report("a*/recent", run(weighted_paths(search, index), pairs))
+
+        slow = run(degrees.shortest_path, pairs, budget=BASELINE_BUDGET)
+        report("shortest_path", slow)
+
+        for (_, a), (_, b) in zip(fast, slow):
+            if a != b:
+                print(f"  MISMATCH: {a} != {b} degrees")
+
+
+if __name__ == "__main__":
+    main()
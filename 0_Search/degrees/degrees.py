@@ -1,7 +1,10 @@
 import csv
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+import ingest
+import snapshot
+from graph import Graph, MoviesView, NamesView, PeopleView
+from util import Node
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -52,6 +55,38 @@ def load_data(directory):
                 pass
 
 
+def load_graph(directory):
+    """
+    Load data from a binary snapshot of the CSV files, building the
+    snapshot first if it is missing or the CSV files have changed.
+    Returns the Graph; when it comes from the snapshot, `names`,
+    `people` and `movies` become read-only views onto it.
+    Deltas journaled by ingest.py are replayed on top.
+    """
+    global names, people, movies
+
+    graph = snapshot.load(directory)
+    if graph is not None:
+        names = NamesView(graph)
+        people = PeopleView(graph)
+        movies = MoviesView(graph)
+    else:
+        load_data(directory)
+        graph = Graph.from_data(people, movies)
+
+        # A read-only data directory just means no snapshot next time
+        try:
+            snapshot.write(graph, directory)
+        except OSError:
+            pass
+
+    for delta in ingest.read_journal(directory):
+        ingest.apply(graph, delta)
+        if isinstance(people, dict):
+            ingest.apply_to_data(names, people, movies, delta)
+    return graph
+
+
 def main():
     if len(sys.argv) > 2:
         sys.exit("Usage: python degrees.py [directory]")
@@ -59,7 +94,7 @@ def main():
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    graph = load_graph(directory)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -69,7 +104,7 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    path = graph.shortest_path(source, target)
 
     if path is None:
         print("Not connected.")
@@ -121,6 +156,77 @@ def shortest_path(source, target):
 
 
 
+def bidirectional_search(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching outwards
+    from both people at once until the two frontiers meet.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # Nodes reached from each end, keyed by person_id
+    forward = {source: Node(state=source, parent=None, action=None)}
+    backward = {target: Node(state=target, parent=None, action=None)}
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+
+        # Always grow the side with the smaller frontier by one full layer
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meeting = expand_layer(forward_layer, forward, backward)
+            if meeting is not None:
+                return join_paths(meeting, backward[meeting.state])
+        else:
+            backward_layer, meeting = expand_layer(backward_layer, backward, forward)
+            if meeting is not None:
+                return join_paths(forward[meeting.state], meeting)
+
+    return None
+
+
+def expand_layer(layer, reached, other):
+    """
+    Expands every person in `layer` by one hop, recording parent pointers
+    in `reached`. Returns the next layer and, if the search touched a
+    person already reached from the other end, the node for that person.
+    """
+    next_layer = []
+    for person_id in layer:
+        node = reached[person_id]
+        for movie_id, neighbor_id in neighbors_for_person(person_id):
+            if neighbor_id in reached:
+                continue
+            child = Node(state=neighbor_id, parent=node, action=movie_id)
+            if neighbor_id in other:
+                return next_layer, child
+            reached[neighbor_id] = child
+            next_layer.append(neighbor_id)
+    return next_layer, None
+
+
+def join_paths(forward_node, backward_node):
+    """
+    Builds the (movie_id, person_id) path through a meeting person, given
+    that person's node in the forward tree and in the backward tree.
+    """
+    path = []
+    node = forward_node
+    while node.parent is not None:
+        path.append((node.action, node.state))
+        node = node.parent
+    path.reverse()
+
+    node = backward_node
+    while node.parent is not None:
+        path.append((node.action, node.parent.state))
+        node = node.parent
+    return path
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
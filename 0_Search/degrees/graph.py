@@ -0,0 +1,556 @@
+"""
+Compact co-star graph for degrees.
+
+People and movies are interned to consecutive integers and their
+adjacency is stored in compressed sparse row (CSR) form: for person
+index p, the movies they starred in are
+
+    person_movies[person_offsets[p]:person_offsets[p + 1]]
+
+and likewise movie_stars/movie_offsets for the stars of each movie.
+Names, titles and other text are held in StringTables, which can be
+backed either by Python lists or by a memory-mapped snapshot.
+"""
+
+from array import array
+from collections.abc import Mapping
+
+
+class StringTable():
+    """
+    Sequence of strings packed into one UTF-8 blob, decoded on access.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = memoryview(blob)
+        self.offsets = memoryview(offsets)
+
+    @classmethod
+    def build(cls, strings):
+        blob = bytearray()
+        offsets = array("I", [0])
+        for s in strings:
+            blob += s.encode("utf-8")
+            offsets.append(len(blob))
+        return cls(blob, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+
+class SortedIndex():
+    """
+    Maps keys to positions in `keys` by binary search over `order`,
+    a permutation of those positions sorted by key(keys[i]).
+    """
+
+    def __init__(self, keys, order, key=None):
+        self.keys = keys
+        self.order = memoryview(order)
+        self.key = key
+
+        # Positions inserted after the index was built, by normalised key
+        self.added = {}
+
+    @classmethod
+    def build(cls, keys, key=None):
+        if key is None:
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+        else:
+            order = sorted(range(len(keys)), key=lambda i: key(keys[i]))
+        return cls(keys, array("I", order), key)
+
+    def key_at(self, position):
+        """
+        Returns the (normalised) key stored at `position` in sorted order.
+        """
+        k = self.keys[self.order[position]]
+        return k if self.key is None else self.key(k)
+
+    def lower_bound(self, k):
+        """
+        Returns the first sorted position whose key is not less than `k`.
+        """
+        lo, hi = 0, len(self.order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.key_at(mid) < k:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def insert(self, k, i):
+        """
+        Adds position `i` under the normalised key `k`.
+        """
+        self.added.setdefault(k, []).append(i)
+
+    def all(self, k):
+        """
+        Returns the positions of every entry whose key equals `k`.
+        """
+        matches = list(self.added.get(k, ()))
+        position = self.lower_bound(k)
+        while position < len(self.order) and self.key_at(position) == k:
+            matches.append(self.order[position])
+            position += 1
+        return matches
+
+    def get(self, k, default=None):
+        if k in self.added:
+            return self.added[k][0]
+        position = self.lower_bound(k)
+        if position < len(self.order) and self.key_at(position) == k:
+            return self.order[position]
+        return default
+
+    def __getitem__(self, k):
+        i = self.get(k)
+        if i is None:
+            raise KeyError(k)
+        return i
+
+    def __contains__(self, k):
+        return self.get(k) is not None
+
+
+class Appended():
+    """
+    Sequence made of a read-only `base` sequence followed by a list of
+    items appended since, so snapshot-backed tables can grow.
+    """
+
+    def __init__(self, base):
+        self.base = base
+        self.extra = []
+
+    def __len__(self):
+        return len(self.base) + len(self.extra)
+
+    def __getitem__(self, i):
+        if i < len(self.base):
+            return self.base[i]
+        return self.extra[i - len(self.base)]
+
+    def __iter__(self):
+        for i in range(len(self.base)):
+            yield self.base[i]
+        yield from self.extra
+
+    def append(self, item):
+        self.extra.append(item)
+
+
+class Graph():
+
+    def __init__(self, person_ids, movie_ids,
+                 person_offsets, person_movies,
+                 movie_offsets, movie_stars,
+                 person_names, person_births,
+                 movie_titles, movie_years,
+                 person_index=None, movie_index=None, name_index=None):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+
+        # Id lookups are plain dicts unless sorted indexes are supplied
+        if person_index is None:
+            person_index = {
+                person_id: i for i, person_id in enumerate(person_ids)
+            }
+        if movie_index is None:
+            movie_index = {
+                movie_id: i for i, movie_id in enumerate(movie_ids)
+            }
+        if name_index is None:
+            name_index = SortedIndex.build(person_names, key=str.lower)
+        self.person_index = person_index
+        self.movie_index = movie_index
+        self.name_index = name_index
+
+        # Views let searches slice the buffers without copying them
+        self.person_offsets = memoryview(person_offsets)
+        self.person_movies = memoryview(person_movies)
+        self.movie_offsets = memoryview(movie_offsets)
+        self.movie_stars = memoryview(movie_stars)
+        self.base_people = len(self.person_offsets) - 1
+        self.base_movies = len(self.movie_offsets) - 1
+
+        # Adjacency added since the buffers were built, by index
+        self.added_movies = {}
+        self.added_stars = {}
+
+    @classmethod
+    def from_data(cls, people, movies):
+        """
+        Build a graph from the `people` and `movies` dictionaries
+        produced by degrees.load_data.
+        """
+        person_ids = list(people)
+        movie_ids = list(movies)
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        person_offsets = array("I", [0])
+        person_movies = array("I")
+        for person_id in person_ids:
+            person_movies.extend(
+                movie_index[movie_id] for movie_id in people[person_id]["movies"]
+            )
+            person_offsets.append(len(person_movies))
+
+        movie_offsets = array("I", [0])
+        movie_stars = array("I")
+        for movie_id in movie_ids:
+            movie_stars.extend(
+                person_index[person_id] for person_id in movies[movie_id]["stars"]
+            )
+            movie_offsets.append(len(movie_stars))
+
+        return cls(person_ids, movie_ids,
+                   person_offsets, person_movies,
+                   movie_offsets, movie_stars,
+                   [people[person_id]["name"] for person_id in person_ids],
+                   [people[person_id]["birth"] for person_id in person_ids],
+                   [movies[movie_id]["title"] for movie_id in movie_ids],
+                   [movies[movie_id]["year"] for movie_id in movie_ids],
+                   person_index, movie_index)
+
+    def nbytes(self):
+        """
+        Returns the number of bytes used by the adjacency buffers.
+        """
+        return sum(view.nbytes for view in (
+            self.person_offsets, self.person_movies,
+            self.movie_offsets, self.movie_stars
+        ))
+
+    def movies_of(self, p):
+        """
+        Returns the movie indices of person index `p`, without copying
+        unless movies have been added to `p` since the buffers were built.
+        """
+        if self.added_movies and p in self.added_movies:
+            movies = self.added_movies[p]
+            if p < self.base_people:
+                offsets = self.person_offsets
+                movies = list(self.person_movies[offsets[p]:offsets[p + 1]]) + movies
+            return movies
+        offsets = self.person_offsets
+        return self.person_movies[offsets[p]:offsets[p + 1]]
+
+    def stars_of(self, m):
+        """
+        Returns the person indices starring in movie index `m`, without copying
+        unless stars have been added to `m` since the buffers were built.
+        """
+        if self.added_stars and m in self.added_stars:
+            stars = self.added_stars[m]
+            if m < self.base_movies:
+                offsets = self.movie_offsets
+                stars = list(self.movie_stars[offsets[m]:offsets[m + 1]]) + stars
+            return stars
+        offsets = self.movie_offsets
+        return self.movie_stars[offsets[m]:offsets[m + 1]]
+
+    def add_person(self, person_id, name, birth):
+        """
+        Adds a person with no movies and returns their index, or returns
+        the existing index if `person_id` is already known.
+        """
+        p = self.person_index.get(person_id)
+        if p is not None:
+            return p
+        self._make_growable()
+        p = len(self.person_ids)
+        self.person_ids.append(person_id)
+        self.person_names.append(name)
+        self.person_births.append(birth)
+        self._insert(self.person_index, person_id, p)
+        self.name_index.insert(name.lower(), p)
+        self.added_movies[p] = []
+        return p
+
+    def add_movie(self, movie_id, title, year):
+        """
+        Adds a movie with no stars and returns its index, or returns the
+        existing index if `movie_id` is already known.
+        """
+        m = self.movie_index.get(movie_id)
+        if m is not None:
+            return m
+        self._make_growable()
+        m = len(self.movie_ids)
+        self.movie_ids.append(movie_id)
+        self.movie_titles.append(title)
+        self.movie_years.append(year)
+        self._insert(self.movie_index, movie_id, m)
+        self.added_stars[m] = []
+        return m
+
+    def add_star(self, p, m):
+        """
+        Records that person index `p` starred in movie index `m`.
+        Returns False if that was already known.
+        """
+        if m in self.movies_of(p):
+            return False
+        self.added_movies.setdefault(p, []).append(m)
+        self.added_stars.setdefault(m, []).append(p)
+        return True
+
+    def _make_growable(self):
+        for name in ("person_ids", "person_names", "person_births",
+                     "movie_ids", "movie_titles", "movie_years"):
+            table = getattr(self, name)
+            if not isinstance(table, (list, Appended)):
+                setattr(self, name, Appended(table))
+
+    @staticmethod
+    def _insert(index, k, i):
+        if isinstance(index, dict):
+            index[k] = i
+        else:
+            index.insert(k, i)
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, using a bidirectional
+        breadth-first search over the CSR buffers.
+
+        If no possible path, returns None.
+        """
+        if source == target:
+            return []
+        s = self.person_index[source]
+        t = self.person_index[target]
+
+        # Maps a reached person index to (movie index, previous person index)
+        forward = {s: None}
+        backward = {t: None}
+        forward_movies = set()
+        backward_movies = set()
+        forward_layer = [s]
+        backward_layer = [t]
+
+        while forward_layer and backward_layer:
+            if len(forward_layer) <= len(backward_layer):
+                forward_layer, meeting = self._expand(
+                    forward_layer, forward, forward_movies, backward
+                )
+            else:
+                backward_layer, meeting = self._expand(
+                    backward_layer, backward, backward_movies, forward
+                )
+            if meeting is not None:
+                return self._join(meeting, forward, backward)
+
+        return None
+
+    def _expand(self, layer, reached, seen_movies, other):
+        """
+        Expands `layer` by one hop, recording parents in `reached`.
+        Each movie's cast is scanned at most once per side, since every
+        star of a movie is reached the first time the movie is seen.
+        Returns the next layer and the meeting person index, if any.
+        """
+        movies_of = self.movies_of
+        stars_of = self.stars_of
+
+        next_layer = []
+        for p in layer:
+            for m in movies_of(p):
+                if m in seen_movies:
+                    continue
+                seen_movies.add(m)
+                for q in stars_of(m):
+                    if q in reached:
+                        continue
+                    reached[q] = (m, p)
+                    if q in other:
+                        return next_layer, q
+                    next_layer.append(q)
+        return next_layer, None
+
+    def _join(self, meeting, forward, backward):
+        """
+        Builds the (movie_id, person_id) path through the meeting person.
+        """
+        path = []
+        p = meeting
+        while forward[p] is not None:
+            m, previous = forward[p]
+            path.append((self.movie_ids[m], self.person_ids[p]))
+            p = previous
+        path.reverse()
+
+        p = meeting
+        while backward[p] is not None:
+            m, following = backward[p]
+            path.append((self.movie_ids[m], self.person_ids[following]))
+            p = following
+        return path
+
+    def search_tree(self, source):
+        """
+        Returns the breadth-first search tree of every person reachable
+        from the person index `source`.
+        """
+        movies_of = self.movies_of
+        stars_of = self.stars_of
+
+        parent_movie = array("i", [-1]) * len(self.person_ids)
+        parent_person = array("i", [-1]) * len(self.person_ids)
+        seen_movies = bytearray(len(self.movie_ids))
+        parent_person[source] = source
+
+        layer = [source]
+        while layer:
+            next_layer = []
+            for p in layer:
+                for m in movies_of(p):
+                    if seen_movies[m]:
+                        continue
+                    seen_movies[m] = 1
+                    for q in stars_of(m):
+                        if parent_person[q] == -1:
+                            parent_person[q] = p
+                            parent_movie[q] = m
+                            next_layer.append(q)
+            layer = next_layer
+        return SearchTree(self, source, parent_movie, parent_person)
+
+
+class SearchTree():
+    """
+    Breadth-first search tree rooted at one person, stored as parent
+    arrays over person indices (-1 where a person is unreachable).
+    """
+
+    def __init__(self, graph, source, parent_movie, parent_person):
+        self.graph = graph
+        self.source = source
+        self.parent_movie = parent_movie
+        self.parent_person = parent_person
+
+    def nbytes(self):
+        return (self.parent_movie.itemsize * len(self.parent_movie)
+                + self.parent_person.itemsize * len(self.parent_person))
+
+    def reaches(self, p):
+        # People added after the tree was built are outside its arrays
+        return p < len(self.parent_person) and self.parent_person[p] != -1
+
+    def path_to(self, p):
+        """
+        Returns the (movie_id, person_id) path from the root to person
+        index `p`, or None if `p` is unreachable.
+        """
+        path = self.path_from(p)
+        if path is None:
+            return None
+        graph = self.graph
+        people = [graph.person_ids[p]] + [person_id for _, person_id in path]
+        return [(path[i][0], people[i]) for i in reversed(range(len(path)))]
+
+    def path_from(self, p):
+        """
+        Returns the (movie_id, person_id) path from person index `p`
+        back to the root, or None if `p` is unreachable.
+        """
+        if not self.reaches(p):
+            return None
+        graph = self.graph
+        path = []
+        while p != self.source:
+            q = self.parent_person[p]
+            path.append((graph.movie_ids[self.parent_movie[p]], graph.person_ids[q]))
+            p = q
+        return path
+
+
+class NamesView(Mapping):
+    """
+    Read-only stand-in for degrees.names backed by a Graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        graph = self.graph
+        matches = graph.name_index.all(name)
+        if not matches:
+            raise KeyError(name)
+        return {graph.person_ids[p] for p in matches}
+
+    def __iter__(self):
+        index = self.graph.name_index
+        previous = None
+        for position in range(len(index.order)):
+            name = index.key_at(position)
+            if name != previous:
+                yield name
+                previous = name
+        for name, added in index.added.items():
+            if len(index.all(name)) == len(added):
+                yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class PeopleView(Mapping):
+    """
+    Read-only stand-in for degrees.people backed by a Graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        p = graph.person_index[person_id]
+        return {
+            "name": graph.person_names[p],
+            "birth": graph.person_births[p],
+            "movies": {graph.movie_ids[m] for m in graph.movies_of(p)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Read-only stand-in for degrees.movies backed by a Graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        m = graph.movie_index[movie_id]
+        return {
+            "title": graph.movie_titles[m],
+            "year": graph.movie_years[m],
+            "stars": {graph.person_ids[p] for p in graph.stars_of(m)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
@@ -0,0 +1,215 @@
+"""
+Incremental ingest for degrees.
+
+A delta is a directory holding any of people.csv, movies.csv and
+stars.csv, in the same format as the full data set. Applying it adds
+the new people, movies and credits to an already-loaded graph without
+rebuilding it, evicts cached search trees the new credits could
+shorten, and lowers landmark distances in place.
+
+Deltas are also appended to a journal next to the snapshot, which
+degrees.load_graph replays on start-up. The journal is tagged with the
+snapshot's CSV digests; when the CSVs change it is replayed on the
+rebuilt data and re-tagged, never dropped.
+
+Usage: python ingest.py directory delta
+"""
+
+import csv
+import json
+import os
+import sys
+
+import snapshot
+
+JOURNAL = "degrees.journal"
+TABLES = ("people", "movies", "stars")
+
+
+def journal_path(directory):
+    return os.path.join(directory, JOURNAL)
+
+
+def journal_size(directory):
+    """
+    Returns the size of the journal for `directory`, 0 if there is none.
+    """
+    try:
+        return os.path.getsize(journal_path(directory))
+    except FileNotFoundError:
+        return 0
+
+
+def read_delta(directory):
+    """
+    Returns a dictionary of row lists read from whichever of people.csv,
+    movies.csv and stars.csv exist in `directory`.
+    """
+    delta = {}
+    for table in TABLES:
+        path = os.path.join(directory, f"{table}.csv")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                delta[table] = list(csv.DictReader(f))
+        else:
+            delta[table] = []
+    return delta
+
+
+def read_journal(directory):
+    """
+    Returns the deltas journaled for `directory`. A journal written
+    against CSVs that have since changed is kept and re-tagged with the
+    current digests: replaying a delta is idempotent, so deltas already
+    folded into the CSVs do no harm, and none added only by ingest are
+    lost.
+    """
+    path = journal_path(directory)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+
+    # A journal cut short before its header was written holds no deltas
+    if not lines:
+        return []
+    header = json.loads(lines[0])
+    digests = snapshot.source_digests(directory).hex()
+    if header["digests"] != digests:
+        print(f"CSV files in {directory} changed; replaying "
+              f"{len(lines) - 1} journaled deltas on the rebuilt data.",
+              file=sys.stderr)
+        retag_journal(path, lines[1:], digests)
+    return [json.loads(line) for line in lines[1:] if line]
+
+
+def retag_journal(path, deltas, digests):
+    """
+    Rewrites the journal at `path` with `digests` in its header, under a
+    temporary name renamed into place. Left as it is if that fails, for
+    instance on read-only data.
+    """
+    temp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"digests": digests}) + "\n")
+            for line in deltas:
+                f.write(line + "\n")
+        os.replace(temp, path)
+    except OSError:
+        if os.path.exists(temp):
+            os.remove(temp)
+
+
+def append_journal(directory, delta):
+    """
+    Appends `delta` to the journal for `directory`.
+    """
+    path = journal_path(directory)
+    with open(path, "a", encoding="utf-8") as f:
+        if f.tell() == 0:
+            header = {"digests": snapshot.source_digests(directory).hex()}
+            f.write(json.dumps(header) + "\n")
+        f.write(json.dumps(delta) + "\n")
+
+
+def apply(graph, delta):
+    """
+    Adds the rows of `delta` to `graph`. Credits naming an unknown
+    person or movie are skipped, as in degrees.load_data.
+    Returns the (person index, movie index) credits that were new.
+    """
+    for row in delta["people"]:
+        graph.add_person(row["id"], row["name"], row["birth"])
+    for row in delta["movies"]:
+        graph.add_movie(row["id"], row["title"], row["year"])
+
+    added = []
+    for row in delta["stars"]:
+        p = graph.person_index.get(row["person_id"])
+        m = graph.movie_index.get(row["movie_id"])
+        if p is None or m is None:
+            continue
+        if graph.add_star(p, m):
+            added.append((p, m))
+    return added
+
+
+def apply_to_data(names, people, movies, delta):
+    """
+    Adds the rows of `delta` to the dictionaries built by degrees.load_data.
+    """
+    for row in delta["people"]:
+        if row["id"] in people:
+            continue
+        people[row["id"]] = {
+            "name": row["name"],
+            "birth": row["birth"],
+            "movies": set()
+        }
+        names.setdefault(row["name"].lower(), set()).add(row["id"])
+    for row in delta["movies"]:
+        if row["id"] in movies:
+            continue
+        movies[row["id"]] = {
+            "title": row["title"],
+            "year": row["year"],
+            "stars": set()
+        }
+    for row in delta["stars"]:
+        try:
+            people[row["person_id"]]["movies"].add(row["movie_id"])
+            movies[row["movie_id"]]["stars"].add(row["person_id"])
+        except KeyError:
+            pass
+
+
+def touched_people(graph, added):
+    """
+    Returns the person indices whose distances the credits in `added`
+    may have shortened: everyone in a movie that gained a star.
+    """
+    people = set()
+    for _, m in added:
+        people.update(graph.stars_of(m))
+    return people
+
+
+def ingest(graph, delta, directory=None, caches=(), landmarks=None):
+    """
+    Applies `delta` to `graph`, journals it for `directory` if given,
+    evicts affected trees from each TreeCache in `caches`, and updates
+    the LandmarkIndex `landmarks`, saving it if `directory` is given.
+    Returns the (person index, movie index) credits that were new.
+    """
+    added = apply(graph, delta)
+    if directory is not None:
+        append_journal(directory, delta)
+
+    people = touched_people(graph, added)
+    for cache in caches:
+        cache.invalidate(people)
+    if landmarks is not None:
+        landmarks.update(added)
+        if directory is not None:
+            landmarks.save(directory)
+    return added
+
+
+def main():
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python ingest.py directory delta")
+    import degrees
+    import landmarks
+
+    directory = sys.argv[1]
+    graph = degrees.load_graph(directory)
+    index = landmarks.LandmarkIndex.load(graph, directory)
+    delta = read_delta(sys.argv[2])
+    added = ingest(graph, delta, directory, landmarks=index)
+    print(f"Added {len(delta['people'])} people, {len(delta['movies'])} movies "
+          f"and {len(added)} new credits.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""
+Landmark distance oracle for degrees.
+
+The index stores breadth-first distances, in degrees of separation,
+from a few well-connected "landmark" people to everyone else. By the
+triangle inequality, for any landmark L
+
+    |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t)
+
+which bounds the separation of any pair without searching, and gives
+a consistent heuristic for exact A*-style searches.
+
+Usage: python landmarks.py directory [landmarks]
+"""
+
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import deque
+
+import degrees
+import ingest
+import snapshot
+
+LANDMARKS = 16
+FILENAME = "degrees.landmarks"
+MAGIC = b"DEGLMK\0\0"
+VERSION = 2
+HEADER = struct.Struct("<8sIIIQ")
+
+# Distances are stored as uint8; this marks people a landmark cannot reach
+UNREACHABLE = 255
+
+# Distances of SATURATED or more are all stored as SATURATED, so they
+# still give lower bounds but never upper ones
+SATURATED = UNREACHABLE - 1
+
+
+def landmarks_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+class LandmarkIndex():
+
+    def __init__(self, graph, landmarks, distances):
+        self.graph = graph
+        self.landmarks = landmarks
+        n = len(graph.person_ids)
+        self.rows = [
+            memoryview(distances)[i * n:(i + 1) * n] for i in range(len(landmarks))
+        ]
+
+    @classmethod
+    def build(cls, graph, k=LANDMARKS):
+        """
+        Choose the `k` people with the most co-star links as landmarks
+        and compute breadth-first distances from each of them.
+        """
+        n = len(graph.person_ids)
+        degree = [
+            sum(len(graph.stars_of(m)) for m in graph.movies_of(p))
+            for p in range(n)
+        ]
+        landmarks = array("I", sorted(range(n), key=degree.__getitem__, reverse=True)[:k])
+
+        distances = bytearray()
+        for landmark in landmarks:
+            distances += distances_from(graph, landmark)
+        return cls(graph, landmarks, distances)
+
+    def bounds(self, s, t):
+        """
+        Returns (lower, upper) bounds on the degrees of separation between
+        person indices `s` and `t`. Both are math.inf if a landmark shows
+        the two are not connected; upper is math.inf if no landmark
+        reaches them with exact distances.
+        """
+        if s == t:
+            return 0, 0
+        lower, upper = 1, math.inf
+        for row in self.rows:
+            ds, dt = row[s], row[t]
+            if ds == UNREACHABLE and dt == UNREACHABLE:
+                continue
+            if ds == UNREACHABLE or dt == UNREACHABLE:
+                return math.inf, math.inf
+            lower = max(lower, abs(ds - dt))
+            if ds != SATURATED and dt != SATURATED:
+                upper = min(upper, ds + dt)
+        return lower, upper
+
+    def update(self, added):
+        """
+        Lowers distances after the (person index, movie index) credits in
+        `added` were applied to the graph. New credits can only shorten
+        paths, so each landmark's row is relaxed outwards from the movies
+        that gained stars, leaving every other distance untouched.
+        """
+        graph = self.graph
+        n = len(graph.person_ids)
+        self.rows = [
+            bytearray(row) + bytearray([UNREACHABLE]) * (n - len(row))
+            for row in self.rows
+        ]
+        movies = {m for _, m in added}
+
+        for row in self.rows:
+            queue = deque()
+            for m in movies:
+                stars = graph.stars_of(m)
+                best = min(row[q] for q in stars)
+                if best >= SATURATED:
+                    continue
+                for q in stars:
+                    if best + 1 < row[q]:
+                        row[q] = best + 1
+                        queue.append(q)
+
+            while queue:
+                p = queue.popleft()
+                d = row[p] + 1
+                if d >= UNREACHABLE:
+                    continue
+                for m in graph.movies_of(p):
+                    for q in graph.stars_of(m):
+                        if d < row[q]:
+                            row[q] = d
+                            queue.append(q)
+
+    def heuristic(self, t):
+        """
+        Returns a function giving, for any person index, a lower bound on
+        its degrees of separation from person index `t`: math.inf if a
+        landmark shows it cannot reach `t`. The bound is consistent, so
+        it can drive A* search directly.
+        """
+        # Only landmarks that reach the target tell us anything about it
+        rows = [(row, row[t]) for row in self.rows if row[t] != UNREACHABLE]
+
+        def lower_bound(p):
+            best = 0
+            for row, dt in rows:
+                dp = row[p]
+                if dp == UNREACHABLE:
+                    return math.inf
+                if dp - dt > best:
+                    best = dp - dt
+                elif dt - dp > best:
+                    best = dt - dp
+            return best
+
+        return lower_bound
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        This is the bidirectional breadth-first search of Graph, pruned
+        A*-style: a person reached after g steps whose heuristic distance
+        h to the other end gives g + h above the landmark upper bound
+        cannot be on a shortest path, so is never expanded.
+
+        If no possible path, returns None.
+        """
+        graph = self.graph
+        if source == target:
+            return []
+        s = graph.person_index[source]
+        t = graph.person_index[target]
+        lower, upper = self.bounds(s, t)
+        if lower == math.inf:
+            return None
+
+        forward = Side(s, self.heuristic(t))
+        backward = Side(t, self.heuristic(s))
+        while forward.layer and backward.layer:
+            if len(forward.layer) <= len(backward.layer):
+                meeting = self._expand(forward, backward, upper)
+            else:
+                meeting = self._expand(backward, forward, upper)
+            if meeting is not None:
+                return graph._join(meeting, forward.reached, backward.reached)
+        return None
+
+    def _expand(self, side, other, upper):
+        """
+        Expands `side` by one layer, skipping people whose lower bound
+        exceeds `upper`. Returns the meeting person index, if any.
+        """
+        graph = self.graph
+        movies_of = graph.movies_of
+        stars_of = graph.stars_of
+        reached = side.reached
+        pruned = side.pruned
+        seen_movies = side.seen_movies
+        heuristic = side.heuristic
+
+        side.depth += 1
+        g = side.depth
+        next_layer = []
+        for p in side.layer:
+            for m in movies_of(p):
+                if m in seen_movies:
+                    continue
+                seen_movies.add(m)
+                for q in stars_of(m):
+                    if q in reached or q in pruned:
+                        continue
+                    if g + heuristic(q) > upper:
+                        pruned.add(q)
+                        continue
+                    reached[q] = (m, p)
+                    if q in other.reached:
+                        return q
+                    next_layer.append(q)
+        side.layer = next_layer
+        return None
+
+    def save(self, directory):
+        """
+        Write the index next to the data in `directory`, tagged with the
+        CSV digests of the snapshot and the journal length it reflects.
+        """
+        path = landmarks_path(directory)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(self.landmarks),
+                                len(self.graph.person_ids), ingest.journal_size(directory)))
+            f.write(snapshot.source_digests(directory))
+            f.write(self.landmarks)
+            for row in self.rows:
+                f.write(row)
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, graph, directory):
+        """
+        Memory-map the index saved in `directory`, or return None if it
+        is missing or was built from different data.
+        """
+        path = landmarks_path(directory)
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, k, n, journaled = HEADER.unpack_from(data, 0)
+        digests = snapshot.source_digests(directory)
+        start = HEADER.size + len(digests)
+        if (magic != MAGIC or version != VERSION or n != len(graph.person_ids)
+                or journaled != ingest.journal_size(directory)
+                or data[HEADER.size:start] != digests):
+            data.close()
+            return None
+
+        view = memoryview(data)
+        landmarks = view[start:start + 4 * k].cast("I")
+        index = cls(graph, landmarks, view[start + 4 * k:start + 4 * k + k * n])
+        index.mapping = data
+        return index
+
+
+class Side():
+    """
+    State of one end of a pruned bidirectional search.
+    """
+
+    def __init__(self, root, heuristic):
+        self.reached = {root: None}
+        self.pruned = set()
+        self.seen_movies = set()
+        self.layer = [root]
+        self.depth = 0
+        self.heuristic = heuristic
+
+
+def distances_from(graph, source):
+    """
+    Returns a bytearray of breadth-first distances from person index
+    `source` to every person, capped at SATURATED.
+    """
+    distances = bytearray([UNREACHABLE]) * len(graph.person_ids)
+    seen_movies = bytearray(len(graph.movie_ids))
+    distances[source] = 0
+    layer = [source]
+    depth = 0
+    while layer:
+        depth = min(depth + 1, SATURATED)
+        next_layer = []
+        for p in layer:
+            for m in graph.movies_of(p):
+                if seen_movies[m]:
+                    continue
+                seen_movies[m] = 1
+                for q in graph.stars_of(m):
+                    if distances[q] == UNREACHABLE:
+                        distances[q] = depth
+                        next_layer.append(q)
+        layer = next_layer
+    return distances
+
+
+def load_index(graph, directory, k=LANDMARKS):
+    """
+    Returns the saved landmark index for `directory`, building and
+    saving it first if needed.
+    """
+    index = LandmarkIndex.load(graph, directory)
+    if index is None:
+        index = LandmarkIndex.build(graph, k)
+        index.save(directory)
+    return index
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python landmarks.py directory [landmarks]")
+    directory = sys.argv[1]
+    k = int(sys.argv[2]) if len(sys.argv) == 3 else LANDMARKS
+
+    graph = degrees.load_graph(directory)
+    index = LandmarkIndex.build(graph, k)
+    index.save(directory)
+    print(f"Saved {len(index.landmarks)} landmarks to {landmarks_path(directory)}")
+
+
+if __name__ == "__main__":
+    main()
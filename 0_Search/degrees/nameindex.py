@@ -0,0 +1,180 @@
+"""
+Name lookup for degrees: prefix completion, fuzzy matching and
+non-interactive disambiguation.
+
+Everything runs on the Graph's sorted name index, so it works the same
+over in-memory data and memory-mapped snapshots. Names are compared
+lower-cased, as in degrees.person_id_for_name.
+
+Usage: python nameindex.py directory query
+"""
+
+import sys
+
+import degrees
+
+COMPLETIONS = 10
+MAX_EDITS = 2
+
+# Sorts after every character, so prefix + MAX_CHAR bounds a prefix's range
+MAX_CHAR = "\U0010ffff"
+
+
+class NameIndex():
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.index = graph.name_index
+
+    def complete(self, prefix, limit=COMPLETIONS):
+        """
+        Returns up to `limit` (name, person_id) pairs whose name starts
+        with `prefix`, in alphabetical order.
+        """
+        graph = self.graph
+        index = self.index
+        prefix = prefix.lower()
+        matches = []
+        position = index.lower_bound(prefix)
+        while position < len(index.order) and len(matches) < limit:
+            if not index.key_at(position).startswith(prefix):
+                break
+            p = index.order[position]
+            matches.append((graph.person_names[p], graph.person_ids[p]))
+            position += 1
+
+        # People ingested since the index was built are not in its order
+        for name, people in index.added.items():
+            if name.startswith(prefix):
+                for p in people:
+                    matches.append((graph.person_names[p], graph.person_ids[p]))
+        matches.sort(key=lambda match: match[0].lower())
+        return matches[:limit]
+
+    def fuzzy(self, query, max_edits=MAX_EDITS, limit=COMPLETIONS):
+        """
+        Returns up to `limit` (distance, name, person_id) triples for names
+        within `max_edits` Levenshtein edits of `query`, closest first.
+
+        The sorted names are walked as an implicit trie: each name reuses
+        the edit-distance rows of the prefix it shares with the previous
+        name, and once every entry of a prefix's row exceeds `max_edits`
+        all names with that prefix are skipped with one binary search.
+        """
+        graph = self.graph
+        index = self.index
+        query = query.lower()
+        size = len(index.order)
+
+        # rows[i] is the edit-distance row for the first i characters of key
+        rows = [list(range(len(query) + 1))]
+        key = ""
+        matches = []
+        position = 0
+        while position < size:
+            previous, key = key, index.key_at(position)
+            common = 0
+            bound = min(len(previous), len(key), len(rows) - 1)
+            while common < bound and previous[common] == key[common]:
+                common += 1
+            del rows[common + 1:]
+
+            skip = None
+            for i in range(common, len(key)):
+                row = next_row(rows[-1], query, key[i])
+                rows.append(row)
+                if min(row) > max_edits:
+                    skip = key[:i + 1]
+                    break
+
+            if skip is not None:
+                position = index.lower_bound(skip + MAX_CHAR)
+                continue
+
+            distance = rows[-1][-1]
+            if distance <= max_edits:
+                p = index.order[position]
+                matches.append((distance, graph.person_names[p], graph.person_ids[p]))
+            position += 1
+
+        for name, people in index.added.items():
+            row = rows[0]
+            for c in name:
+                row = next_row(row, query, c)
+            if row[-1] <= max_edits:
+                for p in people:
+                    matches.append((row[-1], graph.person_names[p], graph.person_ids[p]))
+
+        matches.sort(key=lambda match: (match[0], -self.movie_count(match[2])))
+        return matches[:limit]
+
+    def movie_count(self, person_id):
+        graph = self.graph
+        return len(graph.movies_of(graph.person_index[person_id]))
+
+    def candidates(self, name, rank_by="movies"):
+        """
+        Returns the person_ids exactly named `name`, ranked by number of
+        movies (most first) or by birth year (earliest first, unknown last).
+        """
+        graph = self.graph
+        people = self.index.all(name.lower())
+        if rank_by == "movies":
+            people.sort(key=lambda p: -len(graph.movies_of(p)))
+        elif rank_by == "birth":
+            people.sort(key=lambda p: birth_year(graph.person_births[p]))
+        else:
+            raise ValueError(f"unknown ranking: {rank_by}")
+        return [graph.person_ids[p] for p in people]
+
+    def resolve(self, name, rank_by="movies"):
+        """
+        Returns the best-ranked person_id for `name`, or None if there is
+        nobody by that name. Never prompts, unlike person_id_for_name.
+        """
+        candidates = self.candidates(name, rank_by)
+        return candidates[0] if candidates else None
+
+
+def next_row(row, query, c):
+    """
+    Returns the Levenshtein row after appending character `c`,
+    given the row for the preceding prefix.
+    """
+    new = [row[0] + 1]
+    for j in range(1, len(row)):
+        new.append(min(
+            new[j - 1] + 1,
+            row[j] + 1,
+            row[j - 1] + (query[j - 1] != c)
+        ))
+    return new
+
+
+def birth_year(birth):
+    """
+    Returns a sort key for a birth field, placing unknown years last.
+    """
+    try:
+        return (0, int(birth))
+    except ValueError:
+        return (1, 0)
+
+
+def main():
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python nameindex.py directory query")
+    graph = degrees.load_graph(sys.argv[1])
+    names = NameIndex(graph)
+    query = sys.argv[2]
+
+    print("Completions:")
+    for name, person_id in names.complete(query):
+        print(f"  {name} ({person_id})")
+    print("Fuzzy matches:")
+    for distance, name, person_id in names.fuzzy(query):
+        print(f"  {name} ({person_id}), {distance} edits")
+
+
+if __name__ == "__main__":
+    main()
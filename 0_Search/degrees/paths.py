@@ -0,0 +1,231 @@
+"""
+Enumerate every shortest path between two people, or the best few.
+
+A single breadth-first pass from the source records each person's
+distance, stopping at the target's layer. The shortest paths are then
+exactly the walks back from the target that step down one layer at a
+time, which form a directed acyclic graph. Paths are generated lazily
+from it, so pairs joined by millions of equal-length paths can be
+counted or sampled without holding the paths in memory.
+
+Usage: python paths.py directory source_id target_id [k] [recent|popular]
+"""
+
+import heapq
+import itertools
+import sys
+
+import degrees
+
+# Edge costs for ranking paths: lower is better
+LATEST_YEAR = 2100
+
+
+def recent(graph, m):
+    """
+    Cost of a movie link that favours recent movies.
+    """
+    try:
+        return LATEST_YEAR - int(graph.movie_years[m])
+    except ValueError:
+        return LATEST_YEAR
+
+
+def popular(graph, m):
+    """
+    Cost of a movie link that favours movies with large casts.
+    """
+    return -len(graph.stars_of(m))
+
+
+WEIGHTS = {"recent": recent, "popular": popular}
+
+
+class ShortestPaths():
+
+    def __init__(self, graph, source, target):
+        self.graph = graph
+        self.s = graph.person_index[source]
+        self.t = graph.person_index[target]
+        self.distance = self._layer()
+        self._predecessors = {}
+
+    def _layer(self):
+        """
+        Returns a dictionary of breadth-first distances from the source,
+        covering every layer up to and including the target's.
+        """
+        graph = self.graph
+        distance = {self.s: 0}
+        seen_movies = set()
+        layer = [self.s]
+        depth = 0
+        while layer and self.t not in distance:
+            depth += 1
+            next_layer = []
+            for p in layer:
+                for m in graph.movies_of(p):
+                    if m in seen_movies:
+                        continue
+                    seen_movies.add(m)
+                    for q in graph.stars_of(m):
+                        if q not in distance:
+                            distance[q] = depth
+                            next_layer.append(q)
+            layer = next_layer
+        return distance
+
+    def degrees(self):
+        """
+        Returns the degrees of separation, or None if not connected.
+        """
+        return self.distance.get(self.t)
+
+    def predecessors(self, p):
+        """
+        Returns the (movie index, person index) links from person index
+        `p` to people one layer closer to the source.
+        """
+        links = self._predecessors.get(p)
+        if links is None:
+            graph = self.graph
+            distance = self.distance
+            depth = distance[p] - 1
+            links = [
+                (m, q)
+                for m in graph.movies_of(p)
+                for q in graph.stars_of(m)
+                if distance.get(q) == depth
+            ]
+            self._predecessors[p] = links
+        return links
+
+    def count(self):
+        """
+        Returns the number of shortest paths, without enumerating them.
+        """
+        if self.degrees() is None:
+            return 0
+        counts = {self.s: 1}
+
+        def paths_to(p):
+            if p not in counts:
+                counts[p] = sum(paths_to(q) for _, q in self.predecessors(p))
+            return counts[p]
+
+        return paths_to(self.t)
+
+    def paths(self):
+        """
+        Yields every shortest path as a list of (movie_id, person_id)
+        pairs, one at a time, by depth-first search back from the target.
+        """
+        if self.degrees() is None:
+            return
+        if self.s == self.t:
+            yield []
+            return
+        graph = self.graph
+
+        # links[i] is the link chosen at depth i, counting back from the target
+        links = []
+        stack = [iter(self.predecessors(self.t))]
+        people = [self.t]
+        while stack:
+            link = next(stack[-1], None)
+            if link is None:
+                stack.pop()
+                people.pop()
+                if links:
+                    links.pop()
+                continue
+            m, q = link
+            links.append((m, people[-1]))
+            if q == self.s:
+                yield [(graph.movie_ids[m], graph.person_ids[p])
+                       for m, p in reversed(links)]
+                links.pop()
+            else:
+                stack.append(iter(self.predecessors(q)))
+                people.append(q)
+
+    def ranked(self, weight):
+        """
+        Yields (cost, path) for every shortest path in order of
+        increasing total cost, where `weight(graph, m)` is the cost of
+        linking through movie index `m`.
+
+        A best-first search back from the target is guided by the exact
+        cheapest cost from the source to each person, so every popped
+        complete path is the next cheapest, and paths are only built as
+        they are asked for.
+        """
+        if self.degrees() is None:
+            return
+        graph = self.graph
+        best = {self.s: 0}
+
+        def cheapest(p):
+            if p not in best:
+                best[p] = min(
+                    cheapest(q) + weight(graph, m) for m, q in self.predecessors(p)
+                )
+            return best[p]
+
+        cheapest(self.t)
+        tiebreak = itertools.count()
+        heap = [(best[self.t], next(tiebreak), 0, self.t, ())]
+        while heap:
+            _, _, cost, p, suffix = heapq.heappop(heap)
+            if p == self.s:
+                yield cost, [
+                    (graph.movie_ids[m], graph.person_ids[q]) for m, q in suffix
+                ]
+                continue
+            for m, q in self.predecessors(p):
+                step = cost + weight(graph, m)
+                heapq.heappush(heap, (
+                    step + best[q], next(tiebreak), step, q, ((m, p),) + suffix
+                ))
+
+
+def all_shortest_paths(graph, source, target):
+    """
+    Yields every shortest (movie_id, person_id) path from source to target.
+    """
+    return ShortestPaths(graph, source, target).paths()
+
+
+def k_shortest_paths(graph, source, target, k, weight="recent"):
+    """
+    Returns up to `k` (cost, path) pairs: the cheapest shortest paths
+    from source to target under the named weight.
+    """
+    ranked = ShortestPaths(graph, source, target).ranked(WEIGHTS[weight])
+    return list(itertools.islice(ranked, k))
+
+
+def main():
+    if len(sys.argv) not in (4, 5, 6):
+        sys.exit("Usage: python paths.py directory source_id target_id "
+                 "[k] [recent|popular]")
+    graph = degrees.load_graph(sys.argv[1])
+    source, target = sys.argv[2], sys.argv[3]
+    k = int(sys.argv[4]) if len(sys.argv) > 4 else 10
+    weight = sys.argv[5] if len(sys.argv) > 5 else "recent"
+
+    shortest = ShortestPaths(graph, source, target)
+    if shortest.degrees() is None:
+        sys.exit("Not connected.")
+    print(f"{shortest.count()} shortest paths of {shortest.degrees()} degrees.")
+    for cost, path in itertools.islice(shortest.ranked(WEIGHTS[weight]), k):
+        steps = ", ".join(
+            f"{graph.movie_titles[graph.movie_index[m]]} -> "
+            f"{graph.person_names[graph.person_index[p]]}"
+            for m, p in path
+        )
+        print(f"{cost}: {steps}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Long-lived query service for degrees.
+
+Loads the graph once and answers HTTP requests on localhost:
+
+    GET /path?source=...&target=...   shortest path between two people
+    GET /name?q=...                   name completions and fuzzy matches
+    GET /metrics                      request counts and latency histograms
+
+People may be given by id or by unambiguous name, as in batch.py.
+Searches are CPU-bound, so they run in a pool of worker processes that
+memory-map the same snapshot, leaving the event loop free to accept
+connections. At most --concurrency searches are in flight at once, and a
+search still running after --timeout seconds gets a 504 response.
+
+Usage: python server.py directory [--port N] [--workers N] [--timeout S]
+"""
+
+import argparse
+import asyncio
+import bisect
+import json
+import multiprocessing
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import degrees
+from batch import resolve
+from nameindex import COMPLETIONS, NameIndex
+
+PORT = 8000
+ENDPOINTS = ("/path", "/name", "/metrics")
+TIMEOUT = 10
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 500: "Internal Server Error",
+    504: "Gateway Timeout"
+}
+
+# Graph and name index used by worker processes, loaded once per process
+worker_graph = None
+worker_names = None
+
+
+def init_worker(directory):
+    global worker_graph, worker_names
+    worker_graph = degrees.load_graph(directory)
+    worker_names = NameIndex(worker_graph)
+
+
+def find_path(source, target):
+    """
+    Returns the response body for a path query. Raises ValueError if
+    either person cannot be resolved.
+    """
+    graph = worker_graph
+    s = resolve(graph, source)
+    t = resolve(graph, target)
+    path = graph.shortest_path(graph.person_ids[s], graph.person_ids[t])
+    return {
+        "source": graph.person_ids[s],
+        "target": graph.person_ids[t],
+        "degrees": None if path is None else len(path),
+        "path": path
+    }
+
+
+def find_names(query, limit):
+    """
+    Returns the response body for a name query.
+    """
+    return {
+        "completions": [
+            {"name": name, "id": person_id}
+            for name, person_id in worker_names.complete(query, limit)
+        ],
+        "fuzzy": [
+            {"name": name, "id": person_id, "edits": distance}
+            for distance, name, person_id in worker_names.fuzzy(query, limit=limit)
+        ]
+    }
+
+
+class Histogram():
+    """
+    Cumulative latency histogram in the Prometheus exposition format.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def lines(self, name, labels):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {total}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f"{name}_sum{{{labels}}} {self.sum:.6f}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class Server():
+
+    def __init__(self, executor, concurrency, timeout):
+        self.executor = executor
+        self.limit = asyncio.Semaphore(concurrency)
+        self.timeout = timeout
+        self.latency = {}
+        self.responses = Counter()
+        self.in_flight = 0
+
+    async def run(self, function, *args):
+        """
+        Runs `function` in the worker pool once a concurrency slot is
+        free. The slot is held until the worker finishes, even if the
+        request has timed out, so a backlog of slow searches cannot
+        grow past the limit.
+        """
+        await self.limit.acquire()
+        future = asyncio.get_running_loop().run_in_executor(
+            self.executor, function, *args
+        )
+        future.add_done_callback(self.finished)
+        return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+
+    def finished(self, future):
+        self.limit.release()
+        if not future.cancelled():
+            future.exception()
+
+    async def route(self, method, target):
+        """
+        Returns (status, content type, body) for a request.
+        """
+        url = urlsplit(target)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if url.path not in ENDPOINTS:
+            return error(404, f"no such endpoint: {url.path}")
+        if method != "GET":
+            return error(405, f"method not allowed: {method}")
+
+        if url.path == "/metrics":
+            return 200, "text/plain; version=0.0.4", self.metrics()
+
+        try:
+            if url.path == "/path":
+                if "source" not in query or "target" not in query:
+                    return error(400, "source and target are required")
+                body = await self.run(find_path, query["source"], query["target"])
+            else:
+                if "q" not in query:
+                    return error(400, "q is required")
+                limit = int(query.get("limit", COMPLETIONS))
+                body = await self.run(find_names, query["q"], limit)
+        except asyncio.TimeoutError:
+            return error(504, f"search took longer than {self.timeout} s")
+        except ValueError as e:
+            return error(404 if "not found" in str(e) else 400, str(e))
+        return 200, "application/json", json.dumps(body)
+
+    async def handle(self, reader, writer):
+        """
+        Answers one request on a connection, then closes it.
+        """
+        start = time.perf_counter()
+        self.in_flight += 1
+        path = None
+        try:
+            request = await reader.readline()
+            try:
+                method, target, _ = request.decode("latin-1").split()
+            except ValueError:
+                status, content_type, body = error(400, "malformed request line")
+            else:
+                path = urlsplit(target).path
+                while (await reader.readline()).strip():
+                    pass
+                try:
+                    status, content_type, body = await self.route(method, target)
+                except Exception as e:
+                    status, content_type, body = error(500, repr(e))
+
+            data = body.encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: close\r\n\r\n".encode("latin-1") + data
+            )
+            await writer.drain()
+        except ConnectionError:
+            status = None
+        finally:
+            writer.close()
+            self.in_flight -= 1
+
+        endpoint = path if path in ENDPOINTS else "other"
+        if endpoint in ("/path", "/name"):
+            if endpoint not in self.latency:
+                self.latency[endpoint] = Histogram()
+            self.latency[endpoint].observe(time.perf_counter() - start)
+        if status is not None:
+            self.responses[endpoint, status] += 1
+
+    def metrics(self):
+        lines = ["# TYPE degrees_request_seconds histogram"]
+        for path, histogram in sorted(self.latency.items()):
+            lines.extend(histogram.lines("degrees_request_seconds", f'endpoint="{path}"'))
+        lines.append("# TYPE degrees_responses_total counter")
+        for (path, status), count in sorted(self.responses.items()):
+            lines.append(
+                f'degrees_responses_total{{endpoint="{path}",status="{status}"}} {count}'
+            )
+        lines.append("# TYPE degrees_requests_in_flight gauge")
+        lines.append(f"degrees_requests_in_flight {self.in_flight}")
+        return "\n".join(lines) + "\n"
+
+
+def error(status, message):
+    return status, "application/json", json.dumps({"error": message})
+
+
+async def serve(args):
+    with ProcessPoolExecutor(args.workers, initializer=init_worker,
+                             initargs=(args.directory,)) as executor:
+        server = Server(executor, args.concurrency or args.workers, args.timeout)
+        listener = await asyncio.start_server(server.handle, args.host, args.port)
+        print(f"Serving on http://{args.host}:{args.port}")
+        async with listener:
+            await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve degrees queries over HTTP.")
+    parser.add_argument("directory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="number of search processes")
+    parser.add_argument("--concurrency", type=int,
+                        help="searches in flight at once (default: --workers)")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT,
+                        help="seconds before a search gets a 504 response")
+    args = parser.parse_args()
+
+    # Build the snapshot once here, so workers only ever map it
+    degrees.load_graph(args.directory)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
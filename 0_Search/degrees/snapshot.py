@@ -0,0 +1,252 @@
+"""
+Binary snapshots of the degrees data.
+
+A snapshot holds a Graph's CSR buffers, string tables and sorted
+indexes in a single file that is memory-mapped on load, so nothing is
+parsed or copied before the first query. The header records the size,
+mtime and SHA-256 of each CSV the snapshot was built from; a snapshot
+whose sources have changed is treated as missing.
+
+Header fields are little-endian. Sections are written in the native
+byte order of the machine that built the snapshot, so they can be
+mapped without conversion; that order is recorded in the header, and a
+snapshot built with the other byte order is treated as missing.
+
+Layout:
+
+    magic, version, section count, byte order
+    one fingerprint per CSV file
+    section table: name, typecode, offset, length
+    sections, each aligned to 8 bytes
+"""
+
+import hashlib
+import mmap
+import os
+import shutil
+import struct
+import sys
+
+from graph import Graph, SortedIndex, StringTable
+
+MAGIC = b"DEGSNAP\0"
+VERSION = 2
+FILENAME = "degrees.snapshot"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+HEADER = struct.Struct("<8sII8s")
+FINGERPRINT = struct.Struct("<qq32s")
+SECTION = struct.Struct("<31scQQ")
+ALIGNMENT = 8
+BYTE_ORDER = sys.byteorder.encode("ascii")
+
+STRING_TABLES = (
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years"
+)
+ADJACENCY = ("person_offsets", "person_movies", "movie_offsets", "movie_stars")
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def file_hash(path):
+    """
+    Returns the SHA-256 digest of the file at `path`.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def fingerprint(directory):
+    """
+    Returns (size, mtime_ns, sha256) for each CSV file in `directory`.
+    """
+    prints = []
+    for filename in SOURCES:
+        path = os.path.join(directory, filename)
+        stat = os.stat(path)
+        prints.append((stat.st_size, stat.st_mtime_ns, file_hash(path)))
+    return prints
+
+
+def write(graph, directory):
+    """
+    Write `graph` as a snapshot of the CSV files in `directory`.
+    The file is written under a temporary name and renamed into place,
+    so readers never see a partial snapshot.
+    """
+    sections = []
+    for name in ADJACENCY:
+        sections.append((name, getattr(graph, name)))
+    for name in STRING_TABLES:
+        table = StringTable.build(getattr(graph, name))
+        sections.append((name + ".offsets", table.offsets))
+        sections.append((name + ".blob", table.blob))
+    sections.append((
+        "person_id_order", SortedIndex.build(graph.person_ids).order
+    ))
+    sections.append((
+        "movie_id_order", SortedIndex.build(graph.movie_ids).order
+    ))
+    sections.append(("name_order", graph.name_index.order))
+
+    prints = fingerprint(directory)
+    offset = HEADER.size + len(prints) * FINGERPRINT.size
+    offset += len(sections) * SECTION.size
+    table = []
+    for name, view in sections:
+        offset += -offset % ALIGNMENT
+        table.append((name, view, offset))
+        offset += view.nbytes
+
+    path = snapshot_path(directory)
+    temp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(sections), BYTE_ORDER))
+            for size, mtime, digest in prints:
+                f.write(FINGERPRINT.pack(size, mtime, digest))
+            for name, view, offset in table:
+                typecode = view.format.encode("ascii")
+                f.write(SECTION.pack(name.encode("ascii"), typecode, offset, view.nbytes))
+            for name, view, offset in table:
+                f.write(b"\0" * (offset - f.tell()))
+                f.write(view)
+        os.replace(temp, path)
+    except OSError:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+
+def is_current(path, directory):
+    """
+    Returns True if the snapshot at `path` was built from the CSV files
+    currently in `directory`. Files whose mtime changed but whose content
+    did not are still current, and their recorded mtimes are refreshed.
+    """
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return False
+        magic, version, _, order = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION or order.rstrip(b"\0") != BYTE_ORDER:
+            return False
+        recorded = [FINGERPRINT.unpack(f.read(FINGERPRINT.size)) for _ in SOURCES]
+
+    refreshed = {}
+    for i, filename in enumerate(SOURCES):
+        size, mtime, digest = recorded[i]
+        stat = os.stat(os.path.join(directory, filename))
+        if stat.st_size != size:
+            return False
+        if stat.st_mtime_ns == mtime:
+            continue
+        if file_hash(os.path.join(directory, filename)) != digest:
+            return False
+        refreshed[i] = (size, stat.st_mtime_ns, digest)
+
+    if refreshed:
+        refresh(path, refreshed)
+    return True
+
+
+def refresh(path, prints):
+    """
+    Rewrites the fingerprints of the snapshot at `path` given by `prints`,
+    a dictionary from source index to (size, mtime_ns, sha256). A copy is
+    written under a temporary name and renamed into place, so concurrent
+    readers never see it change. Nothing is written if the directory is
+    not writable; the hashes are then checked again on the next load.
+    """
+    if not os.access(os.path.dirname(path) or ".", os.W_OK):
+        return
+    temp = f"{path}.{os.getpid()}.tmp"
+    try:
+        shutil.copyfile(path, temp)
+        with open(temp, "r+b") as f:
+            for i, (size, mtime, digest) in prints.items():
+                f.seek(HEADER.size + i * FINGERPRINT.size)
+                f.write(FINGERPRINT.pack(size, mtime, digest))
+        os.replace(temp, path)
+    except OSError:
+        if os.path.exists(temp):
+            os.remove(temp)
+
+
+def source_digests(directory):
+    """
+    Returns the concatenated SHA-256 digests of the CSV files in
+    `directory`, for tagging files derived from them. They are read from
+    the snapshot when it is current, else hashed from the files, as when
+    the snapshot could not be written.
+    """
+    path = snapshot_path(directory)
+    if not os.path.exists(path) or not is_current(path, directory):
+        return b"".join(
+            file_hash(os.path.join(directory, filename)) for filename in SOURCES
+        )
+    with open(path, "rb") as f:
+        f.seek(HEADER.size)
+        prints = f.read(len(SOURCES) * FINGERPRINT.size)
+    return b"".join(
+        FINGERPRINT.unpack_from(prints, i * FINGERPRINT.size)[2]
+        for i in range(len(SOURCES))
+    )
+
+
+def load(directory):
+    """
+    Memory-map the snapshot for `directory` and return a Graph over it,
+    or None if there is no snapshot or it is out of date.
+    """
+    path = snapshot_path(directory)
+    if not os.path.exists(path) or not is_current(path, directory):
+        return None
+
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(data)
+    _, _, count, _ = HEADER.unpack_from(data, 0)
+    start = HEADER.size + len(SOURCES) * FINGERPRINT.size
+
+    sections = {}
+    for i in range(count):
+        name, typecode, offset, length = SECTION.unpack_from(data, start + i * SECTION.size)
+        section = view[offset:offset + length]
+        sections[name.rstrip(b"\0").decode("ascii")] = section.cast(typecode.decode("ascii"))
+
+    tables = {
+        name: StringTable(sections[name + ".blob"], sections[name + ".offsets"])
+        for name in STRING_TABLES
+    }
+    graph = Graph(
+        tables["person_ids"], tables["movie_ids"],
+        *(sections[name] for name in ADJACENCY),
+        tables["person_names"], tables["person_births"],
+        tables["movie_titles"], tables["movie_years"],
+        person_index=SortedIndex(tables["person_ids"], sections["person_id_order"]),
+        movie_index=SortedIndex(tables["movie_ids"], sections["movie_id_order"]),
+        name_index=SortedIndex(tables["person_names"], sections["name_order"], key=str.lower)
+    )
+
+    # Keep the mapping alive for as long as the graph is
+    graph.mapping = data
+    return graph
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python snapshot.py directory")
+    import degrees
+    degrees.load_data(sys.argv[1])
+    write(Graph.from_data(degrees.people, degrees.movies), sys.argv[1])
+
+
+if __name__ == "__main__":
+    main()
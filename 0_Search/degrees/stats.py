@@ -0,0 +1,184 @@
+"""
+Separation statistics over the whole degrees graph.
+
+Breadth-first searches from many sources run together: each person
+carries an integer bitset with one bit per source, so one sweep over a
+layer advances every search in the batch at once. Per-source totals are
+kept in bit-sliced counters (bit i of every source's count lives in one
+integer), so counting also stays bit-parallel. Batches of sources are
+spread over worker processes that memory-map the same snapshot.
+
+Reports the distribution of degrees of separation, each source's
+eccentricity and average path length, and optionally every person's
+"Bacon number" from a chosen centre.
+
+Usage: python stats.py directory [--sample N] [--workers N] [--centre ID]
+"""
+
+import argparse
+import csv
+import multiprocessing
+import random
+from collections import Counter
+
+import degrees
+from landmarks import UNREACHABLE, distances_from
+
+BATCH = 512
+
+# Graph used by worker processes, loaded once per process
+worker_graph = None
+
+
+def init_worker(directory):
+    global worker_graph
+    worker_graph = degrees.load_graph(directory)
+
+
+def add_bits(counter, bits):
+    """
+    Adds one to every source's count in bit-sliced `counter` whose bit
+    is set in `bits`.
+    """
+    i = 0
+    while bits:
+        if i == len(counter):
+            counter.append(0)
+        c = counter[i]
+        counter[i] = c ^ bits
+        bits &= c
+        i += 1
+
+
+def counter_value(counter, bit):
+    """
+    Returns the count held for source `bit` in a bit-sliced counter.
+    """
+    return sum(((c >> bit) & 1) << i for i, c in enumerate(counter))
+
+
+def multi_source_bfs(graph, sources):
+    """
+    Runs a breadth-first search from every person index in `sources` at
+    once. Returns a list of (eccentricity, reachable, total distance)
+    per source and a Counter of how many (source, person) pairs are at
+    each distance.
+    """
+    n = len(graph.person_ids)
+    seen = [0] * n
+    frontier = {}
+    for bit, s in enumerate(sources):
+        seen[s] |= 1 << bit
+        frontier[s] = frontier.get(s, 0) | 1 << bit
+
+    eccentricity = [0] * len(sources)
+    reachable = [0] * len(sources)
+    total = [0] * len(sources)
+    histogram = Counter()
+    depth = 0
+    while frontier:
+        depth += 1
+
+        # Gather the sources reaching each movie, then pass them to its stars
+        movies = {}
+        for p, bits in frontier.items():
+            for m in graph.movies_of(p):
+                movies[m] = movies.get(m, 0) | bits
+
+        next_frontier = {}
+        counter = []
+        active = 0
+        for m, bits in movies.items():
+            for q in graph.stars_of(m):
+                new = bits & ~seen[q]
+                if new:
+                    seen[q] |= new
+                    next_frontier[q] = next_frontier.get(q, 0) | new
+        for new in next_frontier.values():
+            add_bits(counter, new)
+            active |= new
+            histogram[depth] += new.bit_count()
+
+        for bit in range(len(sources)):
+            if active >> bit & 1:
+                count = counter_value(counter, bit)
+                eccentricity[bit] = depth
+                reachable[bit] += count
+                total[bit] += depth * count
+        frontier = next_frontier
+
+    return list(zip(eccentricity, reachable, total)), histogram
+
+
+def run_batch(sources):
+    results, histogram = multi_source_bfs(worker_graph, sources)
+    return sources, results, histogram
+
+
+def bacon_numbers(graph, centre):
+    """
+    Returns a bytearray of every person's degrees of separation from
+    person index `centre`, with UNREACHABLE for those not connected.
+    """
+    return distances_from(graph, centre)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Degrees of separation statistics.")
+    parser.add_argument("directory")
+    parser.add_argument("--sample", type=int,
+                        help="number of random sources (default: everyone)")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--output", help="CSV file for per-source statistics")
+    parser.add_argument("--centre", help="person_id to compute Bacon numbers from")
+    parser.add_argument("--bacon", help="CSV file for every person's Bacon number")
+    args = parser.parse_args()
+
+    graph = degrees.load_graph(args.directory)
+    sources = [p for p in range(len(graph.person_ids)) if len(graph.movies_of(p))]
+    if args.sample is not None and args.sample < len(sources):
+        sources = random.sample(sources, args.sample)
+    batches = [sources[i:i + BATCH] for i in range(0, len(sources), BATCH)]
+
+    histogram = Counter()
+    per_source = []
+    with multiprocessing.Pool(args.workers, init_worker, (args.directory,)) as pool:
+        for batch, results, counts in pool.imap_unordered(run_batch, batches):
+            histogram.update(counts)
+            per_source.extend(zip(batch, results))
+
+    pairs = sum(histogram.values())
+    print(f"{len(per_source)} sources, {pairs} connected pairs")
+    if pairs:
+        average = sum(d * c for d, c in histogram.items()) / pairs
+        print(f"Average path length: {average:.3f}")
+        print(f"Largest eccentricity: {max(e for _, (e, _, _) in per_source)}")
+        for distance in sorted(histogram):
+            print(f"  {distance}: {histogram[distance]}")
+
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["person_id", "eccentricity", "reachable", "average"])
+            for s, (eccentricity, reachable, total) in per_source:
+                average = round(total / reachable, 4) if reachable else ""
+                writer.writerow([graph.person_ids[s], eccentricity, reachable, average])
+
+    if args.centre:
+        numbers = bacon_numbers(graph, graph.person_index[args.centre])
+        counts = Counter(numbers)
+        print(f"Bacon numbers from {graph.person_names[graph.person_index[args.centre]]}:")
+        for number in sorted(counts):
+            label = "not connected" if number == UNREACHABLE else number
+            print(f"  {label}: {counts[number]}")
+        if args.bacon:
+            with open(args.bacon, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(["person_id", "bacon_number"])
+                for p, number in enumerate(numbers):
+                    if number != UNREACHABLE:
+                        writer.writerow([graph.person_ids[p], number])
+
+
+if __name__ == "__main__":
+    main()
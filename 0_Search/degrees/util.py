@@ -1,3 +1,8 @@
+import heapq
+import itertools
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -7,13 +12,17 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+
+        # Number of nodes in the frontier for each state
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,10 +31,17 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self._discard(node.state)
             return node
 
+    def _discard(self, state):
+        count = self.states[state] - 1
+        if count:
+            self.states[state] = count
+        else:
+            del self.states[state]
+
 
 class QueueFrontier(StackFrontier):
 
@@ -33,6 +49,31 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self._discard(node.state)
+            return node
+
+
+class PriorityFrontier(StackFrontier):
+    """
+    Frontier that removes the node with the lowest `key(node)` first,
+    and among equal keys the one added first.
+    """
+
+    def __init__(self, key):
+        super().__init__()
+        self.frontier = []
+        self.key = key
+        self.counter = itertools.count()
+
+    def add(self, node):
+        heapq.heappush(self.frontier, (self.key(node), next(self.counter), node))
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            _, _, node = heapq.heappop(self.frontier)
+            self._discard(node.state)
             return node
@@ -0,0 +1,255 @@
+"""
+Weighted shortest connections for degrees.
+
+Each co-star link costs the weight of the movie it goes through, so
+the cheapest connection may take more hops than the shortest one. The
+search is a bidirectional Dijkstra over the CSR graph, or, given a
+LandmarkIndex, an A* search guided by its lower bound on hops. Costs
+are whole numbers, at least MIN_COST per hop, which keeps that bound
+admissible and consistent and lets every frontier be a bucket of
+people per cost instead of a heap. Dijkstra settles a whole bucket at
+a time, much as the breadth-first search expands a layer.
+
+Usage: python weighted.py directory source_id target_id [recent|cast|hops]
+"""
+
+import math
+import sys
+from array import array
+
+import degrees
+
+MIN_COST = 1
+
+# Cost per decade of a movie's age under the "recent" weight
+DECADE_COST = 1
+UNKNOWN_AGE_COST = 10
+
+
+def recent(graph, latest):
+    """
+    Returns a movie cost function favouring recent movies: one plus a
+    unit per whole decade before the newest movie in the data.
+    """
+    def cost(m):
+        try:
+            age = max(0, latest - int(graph.movie_years[m]))
+        except ValueError:
+            return MIN_COST + UNKNOWN_AGE_COST
+        return MIN_COST + DECADE_COST * (age // 10)
+    return cost
+
+
+def small_cast(graph, latest):
+    """
+    Returns a movie cost function favouring small casts, where working
+    together is a closer connection.
+    """
+    def cost(m):
+        return max(MIN_COST, len(graph.stars_of(m)) - 1)
+    return cost
+
+
+def hops(graph, latest):
+    """
+    Returns a movie cost function that counts every link the same.
+    """
+    def cost(m):
+        return MIN_COST
+    return cost
+
+
+WEIGHTS = {"recent": recent, "cast": small_cast, "hops": hops}
+
+
+class WeightedSearch():
+
+    def __init__(self, graph, weight="recent"):
+        self.graph = graph
+        self.weight = WEIGHTS[weight]
+        self.costs = array("l")
+
+    def movie_costs(self):
+        """
+        Returns the integer cost of every movie, computed once and
+        extended when movies are ingested.
+        """
+        graph = self.graph
+        if len(self.costs) != len(graph.movie_ids):
+            latest = 0
+            for m in range(len(graph.movie_ids)):
+                try:
+                    latest = max(latest, int(graph.movie_years[m]))
+                except ValueError:
+                    pass
+            cost = self.weight(graph, latest)
+            self.costs = array("l", (cost(m) for m in range(len(graph.movie_ids))))
+        return self.costs
+
+    def shortest_path(self, source, target, landmarks=None):
+        """
+        Returns (cost, path) for the cheapest list of (movie_id, person_id)
+        pairs connecting the source to the target, using A* with the
+        heuristic of `landmarks` if given and bidirectional Dijkstra
+        otherwise.
+
+        If no possible path, returns None.
+        """
+        graph = self.graph
+        if source == target:
+            return 0, []
+        s = graph.person_index[source]
+        t = graph.person_index[target]
+        if landmarks is not None:
+            return self._astar(s, t, landmarks.heuristic(t))
+        return self._bidirectional(s, t)
+
+    def _bidirectional(self, s, t):
+        graph = self.graph
+        costs = self.movie_costs()
+        sides = [Side(s), Side(t)]
+        best = math.inf
+        meeting = None
+        while sides[0].buckets and sides[1].buckets:
+
+            # No path through unsettled people can beat the best found
+            if sides[0].lowest() + sides[1].lowest() >= best:
+                break
+
+            side, other = sides
+            if side.pending() > other.pending():
+                side, other = other, side
+
+            found, person = self._settle(side, other, costs, best)
+            if found < best:
+                best, meeting = found, person
+
+        if meeting is None:
+            return None
+        return best, graph._join(meeting, sides[0].parent, sides[1].parent)
+
+    def _settle(self, side, other, costs, best):
+        """
+        Settles every person in the cheapest bucket of `side`, as the
+        breadth-first search expands a layer. Returns the best meeting
+        cost found, or `best` if none beats it, and the meeting person.
+        """
+        movies_of = self.graph.movies_of
+        stars_of = self.graph.stars_of
+        cost_to = side.cost
+        parent = side.parent
+        seen_movies = side.seen_movies
+        buckets = side.buckets
+        other_cost = other.cost
+
+        c = side.lowest()
+        meeting = None
+        for p in buckets.pop(c):
+            if cost_to[p] != c:
+                continue
+
+            # People settle in cost order, so each movie is entered cheapest first
+            for m in movies_of(p):
+                if m in seen_movies:
+                    continue
+                seen_movies.add(m)
+                cost = c + costs[m]
+                bucket = None
+                for q in stars_of(m):
+                    if cost >= cost_to.get(q, math.inf):
+                        continue
+                    cost_to[q] = cost
+                    parent[q] = (m, p)
+                    if bucket is None:
+                        bucket = buckets.setdefault(cost, [])
+                    bucket.append(q)
+                    if q in other_cost and cost + other_cost[q] < best:
+                        best = cost + other_cost[q]
+                        meeting = q
+        return best, meeting
+
+    def _astar(self, s, t, heuristic):
+        """
+        Returns (cost, path) from person index `s` to `t` by A* over a
+        bucket queue keyed by cost plus MIN_COST times `heuristic`, or
+        None if they are not connected.
+        """
+        graph = self.graph
+        movies_of = graph.movies_of
+        stars_of = graph.stars_of
+        costs = self.movie_costs()
+
+        estimate = {s: MIN_COST * heuristic(s)}
+        if estimate[s] == math.inf:
+            return None
+        cost_to = {s: 0}
+        parent = {s: None}
+        movie_cost = {}
+        buckets = {estimate[s]: [s]}
+        while buckets:
+            f = min(buckets)
+            for p in buckets.pop(f):
+                c = cost_to[p]
+                if c + estimate[p] != f:
+                    continue
+                if p == t:
+                    return c, graph._join(t, parent, {t: None})
+
+                # A movie only needs entering again from a cheaper person
+                for m in movies_of(p):
+                    if movie_cost.get(m, math.inf) <= c:
+                        continue
+                    movie_cost[m] = c
+                    cost = c + costs[m]
+                    for q in stars_of(m):
+                        if cost >= cost_to.get(q, math.inf):
+                            continue
+                        if q not in estimate:
+                            estimate[q] = MIN_COST * heuristic(q)
+                        if estimate[q] == math.inf:
+                            continue
+                        cost_to[q] = cost
+                        parent[q] = (m, p)
+                        buckets.setdefault(cost + estimate[q], []).append(q)
+        return None
+
+
+class Side():
+    """
+    State of one end of a bidirectional Dijkstra search. Costs are small
+    integers, so the frontier is a bucket per pending cost instead of a
+    heap: all pending costs lie within one movie cost of the lowest.
+    """
+
+    def __init__(self, root):
+        self.cost = {root: 0}
+        self.parent = {root: None}
+        self.seen_movies = set()
+        self.buckets = {0: [root]}
+
+    def lowest(self):
+        return min(self.buckets)
+
+    def pending(self):
+        return len(self.buckets[self.lowest()])
+
+
+def main():
+    if len(sys.argv) not in (4, 5):
+        sys.exit("Usage: python weighted.py directory source_id target_id "
+                 "[recent|cast|hops]")
+    graph = degrees.load_graph(sys.argv[1])
+    weight = sys.argv[4] if len(sys.argv) == 5 else "recent"
+    result = WeightedSearch(graph, weight).shortest_path(sys.argv[2], sys.argv[3])
+    if result is None:
+        sys.exit("Not connected.")
+    cost, path = result
+    print(f"Cost {cost:g} over {len(path)} degrees of separation.")
+    for movie_id, person_id in path:
+        movie = graph.movie_titles[graph.movie_index[movie_id]]
+        person = graph.person_names[graph.person_index[person_id]]
+        print(f"  {movie} -> {person}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Benchmarks for the tictactoe search.
+
+Runs each engine's move choice from every reachable non-terminal
+position, counting the positions it expands and the time it takes, and
+checks that every move it picks is optimal. Also compares the raw search
+throughput of list boards and bitboards over the full game tree.
+
+Usage: python benchmark.py
+"""
+
+import time
+
+import bitboard
+import tictactoe as ttt
+
+# Seconds before the baseline stops taking new positions
+BASELINE_BUDGET = 120
+
+
+def reachable_positions():
+    """
+    Returns every board reachable from the initial state by legal play,
+    terminal boards included.
+    """
+    boards = {}
+    stack = [ttt.initial_state()]
+    while stack:
+        board = stack.pop()
+        key = tuple(cell for row in board for cell in row)
+        if key in boards:
+            continue
+        boards[key] = board
+        if not ttt.terminal(board):
+            for action in ttt.actions(board):
+                stack.append(ttt.result(board, action))
+    return list(boards.values())
+
+
+def baseline_minimax(board):
+    """
+    The original minimax, which evaluates each action twice and never prunes.
+    """
+
+    if ttt.terminal(board):
+        return None
+
+    player_turn = ttt.player(board)
+
+    if player_turn == "X":
+
+        highest_value = -99999
+        pick_action = None
+        for action in ttt.actions(board):
+
+            if ttt.min_value(ttt.result(board, action)) > highest_value:
+                highest_value = ttt.min_value(ttt.result(board, action))
+                pick_action = action
+
+        return pick_action
+
+    if player_turn == "O":
+
+        smallest_value = 99999
+        pick_action = None
+        for action in ttt.actions(board):
+
+            if ttt.max_value(ttt.result(board, action)) < smallest_value:
+                smallest_value = ttt.max_value(ttt.result(board, action))
+                pick_action = action
+
+        return pick_action
+
+
+def count_calls(names):
+    """
+    Wraps the named tictactoe functions to count their calls, returning
+    the counter and a function that restores the originals.
+    """
+    counter = {"calls": 0}
+    originals = {name: getattr(ttt, name) for name in names}
+
+    def wrap(function):
+        def counted(*args):
+            counter["calls"] += 1
+            return function(*args)
+        return counted
+
+    for name, function in originals.items():
+        setattr(ttt, name, wrap(function))
+
+    def restore():
+        for name, function in originals.items():
+            setattr(ttt, name, function)
+
+    return counter, restore
+
+
+def solve(positions):
+    """
+    Returns the exact minimax value of every position, keyed by its cells.
+    """
+    values = {}
+
+    def value(board):
+        key = tuple(cell for row in board for cell in row)
+        if key not in values:
+            if ttt.terminal(board):
+                values[key] = ttt.utility(board)
+            else:
+                children = [value(ttt.result(board, a)) for a in ttt.actions(board)]
+                values[key] = max(children) if ttt.player(board) == ttt.X else min(children)
+        return values[key]
+
+    for board in positions:
+        value(board)
+    return values
+
+
+def run(choose, positions, values, nodes, reset=None, budget=None):
+    """
+    Calls `choose` on each position and returns (positions searched,
+    positions expanded, seconds, suboptimal moves). `nodes` returns the
+    running count of expanded positions and `reset`, if given, runs
+    before each position to start from a cold table.
+    """
+    searched = expanded = mistakes = 0
+    elapsed = 0
+    for board in positions:
+        if budget is not None and elapsed > budget:
+            break
+        if reset is not None:
+            reset()
+        before = nodes()
+        start = time.perf_counter()
+        action = choose(board)
+        elapsed += time.perf_counter() - start
+        expanded += nodes() - before
+        searched += 1
+
+        child = ttt.result(board, action)
+        best = values[tuple(cell for row in board for cell in row)]
+        if values[tuple(cell for row in child for cell in row)] != best:
+            mistakes += 1
+    return searched, expanded, elapsed, mistakes
+
+
+def list_tree_size(board):
+    """
+    Returns the number of positions in the full game tree below a list board.
+    """
+    if ttt.terminal(board):
+        ttt.utility(board)
+        return 1
+    ttt.player(board)
+    return 1 + sum(list_tree_size(ttt.result(board, a)) for a in ttt.actions(board))
+
+
+def bitboard_tree_size(x, o):
+    """
+    Returns the number of positions in the full game tree below a bitboard.
+    """
+    if bitboard.terminal(x, o):
+        bitboard.utility(x, o)
+        return 1
+    return 1 + sum(
+        bitboard_tree_size(*bitboard.result(x, o, cell))
+        for cell in bitboard.actions(x, o)
+    )
+
+
+def throughput(label, walk, *args):
+    start = time.perf_counter()
+    count = walk(*args)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<22} {count} positions in {elapsed:.2f} s, "
+          f"{count / elapsed / 1000:.0f}k positions/s")
+    return count / elapsed
+
+
+def report(label, stats):
+    searched, expanded, elapsed, mistakes = stats
+    print(f"  {label:<22} {searched} positions, {expanded} nodes, "
+          f"{elapsed:.2f} s, {1000 * elapsed / max(searched, 1):.3f} ms/move, "
+          f"{mistakes} suboptimal")
+
+
+def reset_table():
+    ttt.transpositions.clear()
+    bitboard.transpositions.clear()
+
+
+def main():
+    positions = reachable_positions()
+    values = solve(positions)
+    playable = [board for board in positions if not ttt.terminal(board)]
+
+    # Hardest positions first, so a budgeted run covers the worst cases
+    playable.sort(key=lambda board: -len(ttt.actions(board)))
+    print(f"{len(positions)} reachable positions, {len(playable)} with a move to make")
+
+    print("Full game tree:")
+    lists = throughput("list boards", list_tree_size, ttt.initial_state())
+    bits = throughput("bitboards", bitboard_tree_size, 0, 0)
+    print(f"  {'':<22} {bits / lists:.1f}x faster")
+
+    print("Move choice from every position:")
+    moves = ttt.book_moves
+    stats = run(ttt.minimax, playable, values, ttt.search_nodes)
+    report("opening book" if ttt.book_moves > moves else "no book, searched", stats)
+    report("bitboard (cold)", run(
+        bitboard.minimax, playable, values, lambda: bitboard.nodes_searched, reset_table
+    ))
+    reset_table()
+    report("bitboard (warm)", run(
+        bitboard.minimax, playable, values, lambda: bitboard.nodes_searched
+    ))
+    print(f"  {'':<22} {len(bitboard.transpositions)} table entries")
+    report("list alpha-beta (cold)", run(
+        ttt.list_minimax, playable, values, lambda: ttt.nodes_searched, reset_table
+    ))
+    reset_table()
+    report("list alpha-beta (warm)", run(
+        ttt.list_minimax, playable, values, lambda: ttt.nodes_searched
+    ))
+
+    counter, restore = count_calls(["max_value", "min_value"])
+    try:
+        report("baseline", run(
+            baseline_minimax, playable, values, lambda: counter["calls"],
+            budget=BASELINE_BUDGET
+        ))
+    finally:
+        restore()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Bitboard representation of tic-tac-toe.
+
+A position is two 9-bit integers, one per player, where bit 3 * i + j is
+set when that player holds cell (i, j). Moves are a single OR, wins a
+handful of mask tests, and the player to move is a comparison of bit
+counts, so the search never copies or rescans a list board. Boards are
+converted to and from the list form only at the API boundary.
+"""
+
+import math
+
+X = "X"
+O = "O"
+
+FULL = 0b111111111
+
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+)
+
+# Cell permutations for the board's rotations and reflections
+SYMMETRIES = [
+    (0, 1, 2, 3, 4, 5, 6, 7, 8), (6, 3, 0, 7, 4, 1, 8, 5, 2),
+    (8, 7, 6, 5, 4, 3, 2, 1, 0), (2, 5, 8, 1, 4, 7, 0, 3, 6),
+    (2, 1, 0, 5, 4, 3, 8, 7, 6), (0, 3, 6, 1, 4, 7, 2, 5, 8),
+    (6, 7, 8, 3, 4, 5, 0, 1, 2), (8, 5, 2, 7, 4, 1, 6, 3, 0)
+]
+
+# PERMUTED[s][bits] is the 9-bit set `bits` under symmetry s
+PERMUTED = [
+    [
+        sum(1 << k for k, source in enumerate(symmetry) if bits >> source & 1)
+        for bits in range(1 << 9)
+    ]
+    for symmetry in SYMMETRIES
+]
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Canonical position -> (value, flag), shared by every search in a game
+transpositions = {}
+
+# Number of positions expanded by alphabeta, for benchmarking
+nodes_searched = 0
+
+
+def from_board(board):
+    """
+    Returns the (x, o) bitboards of a list board.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def to_board(x, o):
+    """
+    Returns the list board of (x, o) bitboards.
+    """
+    return [
+        [X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1 else None
+         for j in range(3)]
+        for i in range(3)
+    ]
+
+
+def player(x, o):
+    """
+    Returns the player to move.
+    """
+    return X if x.bit_count() <= o.bit_count() else O
+
+
+def actions(x, o):
+    """
+    Returns the empty cell indices.
+    """
+    empty = ~(x | o) & FULL
+    return [cell for cell in range(9) if empty >> cell & 1]
+
+
+def result(x, o, cell):
+    """
+    Returns the bitboards after the player to move takes `cell`.
+    """
+    if (x | o) >> cell & 1:
+        raise Exception("cell is taken")
+    if x.bit_count() <= o.bit_count():
+        return x | 1 << cell, o
+    return x, o | 1 << cell
+
+
+def has_line(bits):
+    for mask in WIN_MASKS:
+        if bits & mask == mask:
+            return True
+    return False
+
+
+def winner(x, o):
+    if has_line(x):
+        return X
+    if has_line(o):
+        return O
+    return None
+
+
+def terminal(x, o):
+    return x | o == FULL or has_line(x) or has_line(o)
+
+
+def utility(x, o):
+    if has_line(x):
+        return 1
+    if has_line(o):
+        return -1
+    return 0
+
+
+def canonical(x, o):
+    """
+    Returns a key shared by the position and its rotations and reflections.
+    """
+    return min(table[x] << 9 | table[o] for table in PERMUTED)
+
+
+def orient(x, o):
+    """
+    Returns the canonical key of the position and the index of the
+    symmetry mapping the position onto it. Cell k of the canonical
+    board is cell SYMMETRIES[s][k] of the original.
+    """
+    return min((table[x] << 9 | table[o], s) for s, table in enumerate(PERMUTED))
+
+
+def alphabeta(x, o, alpha, beta):
+    """
+    Returns the minimax value of the position, or a bound on it outside
+    the window (alpha, beta), as tictactoe.alphabeta does for list boards.
+    """
+    global nodes_searched
+
+    key = canonical(x, o)
+    entry = transpositions.get(key)
+    if entry is not None:
+        value, flag = entry
+        if flag == EXACT:
+            return value
+        if flag == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value
+
+    nodes_searched += 1
+    if has_line(x):
+        value = 1
+    elif has_line(o):
+        value = -1
+    elif x | o == FULL:
+        value = 0
+    else:
+        value = None
+    if value is not None:
+        transpositions[key] = (value, EXACT)
+        return value
+
+    low, high = alpha, beta
+    empty = ~(x | o) & FULL
+    if x.bit_count() <= o.bit_count():
+        value = -math.inf
+        for cell in range(9):
+            if empty >> cell & 1:
+                value = max(value, alphabeta(x | 1 << cell, o, alpha, beta))
+                alpha = max(alpha, value)
+                if alpha >= beta:
+                    break
+    else:
+        value = math.inf
+        for cell in range(9):
+            if empty >> cell & 1:
+                value = min(value, alphabeta(x, o | 1 << cell, alpha, beta))
+                beta = min(beta, value)
+                if alpha >= beta:
+                    break
+
+    # A bound at the edge of the utility range is as good as exact
+    if value <= low and value != -1:
+        transpositions[key] = (value, UPPER)
+    elif value >= high and value != 1:
+        transpositions[key] = (value, LOWER)
+    else:
+        transpositions[key] = (value, EXACT)
+    return value
+
+
+def best_cell(x, o):
+    """
+    Returns the optimal cell for the player to move, or None if the
+    game is over.
+    """
+    if terminal(x, o):
+        return None
+    alpha, beta = -math.inf, math.inf
+    pick = None
+    if player(x, o) == X:
+        for cell in actions(x, o):
+            value = alphabeta(*result(x, o, cell), alpha, beta)
+            if value > alpha:
+                alpha = value
+                pick = cell
+    else:
+        for cell in actions(x, o):
+            value = alphabeta(*result(x, o, cell), alpha, beta)
+            if value < beta:
+                beta = value
+                pick = cell
+    return pick
+
+
+def minimax(board):
+    """
+    Returns the optimal (i, j) action for the current player on a list board.
+    """
+    cell = best_cell(*from_board(board))
+    return None if cell is None else divmod(cell, 3)
@@ -0,0 +1,139 @@
+"""
+Perfect-play opening book for tic-tac-toe.
+
+Every legal position is solved once and stored under its canonical key,
+so the 5,478 positions reduce to 765 entries over the 8 board
+symmetries. Each entry packs the canonical key, the minimax value and
+the best cell of the canonical board into one 32-bit word, and the
+table is written next to this module. Looking up a move is then a
+canonical-key computation and a dictionary access. The book is only
+built by running this module; until then tictactoe.minimax searches.
+
+Usage: python book.py    (rebuilds the book)
+"""
+
+import math
+import os
+import struct
+from array import array
+
+import bitboard
+
+FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tictactoe.book")
+MAGIC = b"TTTBOOK\0"
+VERSION = 1
+HEADER = struct.Struct("<8sII")
+
+# Cell stored for positions where the game is over
+NO_MOVE = 15
+
+
+class Book():
+
+    def __init__(self, entries):
+        self.entries = entries
+
+    def lookup(self, x, o):
+        """
+        Returns (value, cell) for a position, with cell None when the
+        game is over.
+        """
+        key, s = bitboard.orient(x, o)
+        value, cell = self.entries[key]
+        if cell == NO_MOVE:
+            return value, None
+        return value, bitboard.SYMMETRIES[s][cell]
+
+    def minimax(self, board):
+        """
+        Returns the optimal (i, j) action for the current player on a list board.
+        """
+        _, cell = self.lookup(*bitboard.from_board(board))
+        return None if cell is None else divmod(cell, 3)
+
+
+def canonical_positions():
+    """
+    Returns the canonical key of every position reachable by legal play.
+    """
+    keys = set()
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        key = bitboard.canonical(x, o)
+        if key in keys:
+            continue
+        keys.add(key)
+        if not bitboard.terminal(x, o):
+            for cell in bitboard.actions(x, o):
+                stack.append(bitboard.result(x, o, cell))
+    return keys
+
+
+def solve():
+    """
+    Returns a dictionary of canonical key to (value, best cell of the
+    canonical board) for every reachable position.
+    """
+    entries = {}
+    for key in canonical_positions():
+        x, o = key >> 9, key & bitboard.FULL
+        value = bitboard.alphabeta(x, o, -math.inf, math.inf)
+        cell = bitboard.best_cell(x, o)
+        entries[key] = (value, NO_MOVE if cell is None else cell)
+    return entries
+
+
+def write(entries, path=FILENAME):
+    words = array("I", sorted(
+        key << 6 | (value + 1) << 4 | cell
+        for key, (value, cell) in entries.items()
+    ))
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(words)))
+        f.write(words.tobytes())
+    os.replace(temporary, path)
+
+
+def read(path=FILENAME):
+    """
+    Returns the entries stored at `path`, or None if there is no
+    readable book of the current version.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if len(data) < HEADER.size:
+        return None
+    magic, version, count = HEADER.unpack_from(data)
+    words = array("I")
+    if magic != MAGIC or version != VERSION or len(data) != HEADER.size + count * words.itemsize:
+        return None
+    words.frombytes(data[HEADER.size:])
+    return {
+        word >> 6: (((word >> 4) & 3) - 1, word & 15)
+        for word in words
+    }
+
+
+def load(path=FILENAME):
+    """
+    Returns the Book at `path`, or an empty Book if `python book.py`
+    has not built one, so that every lookup misses.
+    """
+    entries = read(path)
+    return Book({} if entries is None else entries)
+
+
+def main():
+    entries = solve()
+    write(entries)
+    print(f"Wrote {len(entries)} positions to {FILENAME} "
+          f"({os.path.getsize(FILENAME)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""
+Tic-tac-toe generalised to m-by-n boards with k in a row.
+
+Exhaustive minimax is hopeless beyond 3x3, so moves are chosen by
+iterative-deepening alpha-beta under a time budget: each completed depth
+seeds the move ordering of the next through a transposition table keyed
+on Zobrist hashes, and when time runs out the best move of the deepest
+completed search is played. Positions at the depth limit are scored by
+counting the lines each player can still complete.
+
+Positions are bitboards as in bitboard.py, with bit n * i + j for cell
+(i, j). List boards of any size are converted at the API boundary.
+
+Usage: python mnk.py m n k [seconds]    (the engine plays itself)
+"""
+
+import random
+import sys
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Seconds per move
+BUDGET = 1.0
+
+# Score of a win; wins found sooner score higher
+WIN = 10 ** 6
+
+# Nodes between checks of the clock
+CHECK_EVERY = 1024
+
+# An open line holding c stones of one player is worth LINE_WEIGHT ** c
+LINE_WEIGHT = 8
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class Timeout(Exception):
+    pass
+
+
+class Game():
+
+    def __init__(self, m, n, k, seed=0):
+        if not 1 <= k <= max(m, n):
+            raise ValueError(f"cannot get {k} in a row on a {m}x{n} board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.size = m * n
+        self.full = (1 << self.size) - 1
+
+        # Scores beyond this are wins, WIN less the plies to reach them;
+        # heuristic scores are capped strictly inside it
+        self.decided = WIN - self.size
+
+        # Every run of k cells in a row, column or diagonal, as a bit mask
+        self.lines = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i, end_j = i + (k - 1) * di, j + (k - 1) * dj
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.lines.append(sum(
+                            1 << (n * (i + s * di) + j + s * dj) for s in range(k)
+                        ))
+        self.lines_through = [
+            [mask for mask in self.lines if mask >> cell & 1]
+            for cell in range(self.size)
+        ]
+
+        # Cells through which the most lines pass are tried first
+        self.order = sorted(range(self.size), key=lambda cell: -len(self.lines_through[cell]))
+
+        rng = random.Random(seed)
+        self.zobrist = [[rng.getrandbits(64) for _ in range(self.size)] for _ in range(2)]
+
+    def initial_state(self):
+        return 0, 0
+
+    def player(self, x, o):
+        return X if x.bit_count() <= o.bit_count() else O
+
+    def actions(self, x, o):
+        """
+        Returns the empty cells, most promising first.
+        """
+        taken = x | o
+        return [cell for cell in self.order if not taken >> cell & 1]
+
+    def result(self, x, o, cell):
+        if (x | o) >> cell & 1:
+            raise Exception("cell is taken")
+        if x.bit_count() <= o.bit_count():
+            return x | 1 << cell, o
+        return x, o | 1 << cell
+
+    def has_line(self, bits):
+        for mask in self.lines:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def wins(self, bits, cell):
+        """
+        Returns whether `bits` has a line through `cell`, the latest move.
+        """
+        for mask in self.lines_through[cell]:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def winner(self, x, o):
+        if self.has_line(x):
+            return X
+        if self.has_line(o):
+            return O
+        return None
+
+    def terminal(self, x, o):
+        return x | o == self.full or self.has_line(x) or self.has_line(o)
+
+    def utility(self, x, o):
+        if self.has_line(x):
+            return 1
+        if self.has_line(o):
+            return -1
+        return 0
+
+    def evaluate(self, x, o):
+        """
+        Returns a heuristic score for X: lines only X can still complete
+        count for X, weighted by how many of their cells X already holds,
+        and likewise for O.
+        """
+        score = 0
+        for mask in self.lines:
+            mine = x & mask
+            theirs = o & mask
+            if mine and not theirs:
+                score += LINE_WEIGHT ** mine.bit_count()
+            elif theirs and not mine:
+                score -= LINE_WEIGHT ** theirs.bit_count()
+        return max(1 - self.decided, min(self.decided - 1, score))
+
+    def hash(self, x, o):
+        h = 0
+        for cell in range(self.size):
+            if x >> cell & 1:
+                h ^= self.zobrist[0][cell]
+            elif o >> cell & 1:
+                h ^= self.zobrist[1][cell]
+        return h
+
+    def from_board(self, board):
+        x = o = 0
+        for i in range(self.m):
+            for j in range(self.n):
+                if board[i][j] == X:
+                    x |= 1 << (self.n * i + j)
+                elif board[i][j] == O:
+                    o |= 1 << (self.n * i + j)
+        return x, o
+
+    def to_board(self, x, o):
+        return [
+            [X if x >> (self.n * i + j) & 1 else O if o >> (self.n * i + j) & 1 else EMPTY
+             for j in range(self.n)]
+            for i in range(self.m)
+        ]
+
+
+class Search():
+    """
+    Iterative-deepening alpha-beta for one Game. The transposition table
+    is kept between moves. After each call to best_move, `nodes`,
+    `depth` and `elapsed` describe the search that chose it.
+    """
+
+    def __init__(self, game, budget=BUDGET):
+        self.game = game
+        self.budget = budget
+        self.table = {}
+        self.nodes = 0
+        self.depth = 0
+        self.score = 0
+        self.elapsed = 0
+        self.deadline = None
+
+    def best_move(self, x, o):
+        """
+        Returns the cell to play, or None if the game is over.
+        """
+        game = self.game
+        start = time.perf_counter()
+        self.deadline = start + self.budget
+        self.nodes = 0
+        self.depth = 0
+        if game.terminal(x, o):
+            return None
+
+        side = 0 if game.player(x, o) == X else 1
+        own, other = (x, o) if side == 0 else (o, x)
+        h = game.hash(x, o)
+        empty = game.size - (x | o).bit_count()
+
+        best = game.actions(x, o)[0]
+        for depth in range(1, empty + 1):
+            try:
+                self.score, best = self.root(own, other, h, side, depth)
+            except Timeout:
+                break
+            self.depth = depth
+
+            # A forced result needs no deeper search
+            if abs(self.score) > game.decided:
+                break
+
+        self.elapsed = time.perf_counter() - start
+        return best
+
+    def root(self, own, other, h, side, depth):
+        alpha, beta = -WIN - 1, WIN + 1
+        best = None
+        for cell in self.ordered(own, other, h):
+            value = self.child(own, other, h, side, cell, depth, -beta, -alpha, 0)
+            if value > alpha:
+                alpha = value
+                best = cell
+        self.table[h] = (depth, alpha, EXACT, best)
+        return alpha, best
+
+    def ordered(self, own, other, h):
+        """
+        Returns the empty cells with the table's best move first.
+        """
+        taken = own | other
+        cells = [cell for cell in self.game.order if not taken >> cell & 1]
+        entry = self.table.get(h)
+        if entry is not None and entry[3] is not None and entry[3] in cells:
+            cells.remove(entry[3])
+            cells.insert(0, entry[3])
+        return cells
+
+    def child(self, own, other, h, side, cell, depth, alpha, beta, ply):
+        """
+        Returns the value for the side to move of playing `cell`.
+        """
+        game = self.game
+        own |= 1 << cell
+        if game.wins(own, cell):
+            return WIN - ply
+        if own | other == game.full:
+            return 0
+        return -self.negamax(other, own, h ^ game.zobrist[side][cell], 1 - side,
+                             depth - 1, alpha, beta, ply + 1)
+
+    def negamax(self, own, other, h, side, depth, alpha, beta, ply):
+        """
+        Returns the value of the position for the side to move, `own`,
+        searched `depth` moves ahead, or a bound on it outside the window.
+        """
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0 and time.perf_counter() > self.deadline:
+            raise Timeout
+
+        entry = self.table.get(h)
+        if entry is not None and entry[0] >= depth:
+            _, value, flag, _ = entry
+            value = self.from_table(value, ply)
+            if flag == EXACT:
+                return value
+            if flag == LOWER:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+
+        if depth == 0:
+            return self.game.evaluate(own, other)
+
+        low = alpha
+        value = -WIN - 1
+        best = None
+        for cell in self.ordered(own, other, h):
+            score = self.child(own, other, h, side, cell, depth, -beta, -alpha, ply)
+            if score > value:
+                value = score
+                best = cell
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if value <= low:
+            flag = UPPER
+        elif value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[h] = (depth, self.to_table(value, ply), flag, best)
+        return value
+
+    def to_table(self, value, ply):
+        """
+        Returns `value`, found `ply` moves below the root, with a win
+        scored by its distance from this position instead of the root,
+        so that the entry holds wherever the position is reached.
+        """
+        if value > self.game.decided:
+            return value + ply
+        if value < -self.game.decided:
+            return value - ply
+        return value
+
+    def from_table(self, value, ply):
+        """
+        Returns a table value re-based on the root from `ply` moves below it.
+        """
+        if value > self.game.decided:
+            return value - ply
+        if value < -self.game.decided:
+            return value + ply
+        return value
+
+
+# One Search per board shape, so tables persist through a game
+searches = {}
+
+
+def minimax(board, k=3, budget=BUDGET):
+    """
+    Returns a (i, j) action for the current player on an m-by-n list
+    board with k in a row, chosen within `budget` seconds.
+    """
+    m, n = len(board), len(board[0])
+    if (m, n, k) not in searches:
+        searches[m, n, k] = Search(Game(m, n, k), budget)
+    search = searches[m, n, k]
+    search.budget = budget
+    cell = search.best_move(*search.game.from_board(board))
+    return None if cell is None else divmod(cell, n)
+
+
+def main():
+    if len(sys.argv) not in (4, 5):
+        sys.exit("Usage: python mnk.py m n k [seconds]")
+    m, n, k = (int(arg) for arg in sys.argv[1:4])
+    budget = float(sys.argv[4]) if len(sys.argv) == 5 else BUDGET
+    game = Game(m, n, k)
+    search = Search(game, budget)
+
+    x, o = game.initial_state()
+    while not game.terminal(x, o):
+        mover = game.player(x, o)
+        cell = search.best_move(x, o)
+        x, o = game.result(x, o, cell)
+        print(f"{mover} plays {divmod(cell, n)}: depth {search.depth}, "
+              f"{search.nodes} nodes, {search.elapsed:.2f} s")
+    for row in game.to_board(x, o):
+        print(" ".join(cell or "." for cell in row))
+    print(f"Winner: {game.winner(x, o) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
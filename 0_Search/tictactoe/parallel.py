@@ -0,0 +1,187 @@
+"""
+Root-split parallel search for m,n,k games.
+
+Each move at the root is searched by a worker process to the same fixed
+depth. The best root score found so far lives in shared memory, so a
+worker starting a move searches it with the tightest window known,
+exactly as the serial loop would after the moves finished before it.
+A move whose score does not beat the bound it was searched with is only
+known to be no better, so the best move is taken from the moves whose
+scores did beat their bound.
+
+Usage: python parallel.py [m n k depth] [--positions N] [--workers N ...]
+"""
+
+import argparse
+import math
+import multiprocessing
+import random
+import time
+
+import mnk
+
+POSITIONS = 4
+OPENING_MOVES = 2
+
+# Game, search and shared root bound used by worker processes
+worker_game = None
+worker_search = None
+worker_position = None
+shared_alpha = None
+
+
+def init_worker(m, n, k, alpha):
+    global worker_game, shared_alpha
+    worker_game = mnk.Game(m, n, k)
+    shared_alpha = alpha
+
+
+def search_move(task):
+    """
+    Searches one root move and returns (cell, score, bound it was
+    searched against, nodes).
+    """
+    global worker_search, worker_position
+    own, other, h, side, cell, depth = task
+
+    # Keep the transposition table while the root position is unchanged
+    if worker_position != (own, other, depth):
+        worker_search = fixed_depth_search(worker_game)
+        worker_position = (own, other, depth)
+    nodes = worker_search.nodes
+
+    alpha = shared_alpha.value
+    value = worker_search.child(own, other, h, side, cell, depth,
+                                -mnk.WIN - 1, -alpha, 0)
+    with shared_alpha.get_lock():
+        if value > shared_alpha.value:
+            shared_alpha.value = value
+    return cell, value, alpha, worker_search.nodes - nodes
+
+
+def fixed_depth_search(game):
+    """
+    Returns a Search with no time limit, for fixed-depth searches.
+    """
+    search = mnk.Search(game, budget=math.inf)
+    search.deadline = math.inf
+    return search
+
+
+def root_state(game, x, o):
+    """
+    Returns (own, other, hash, side) for the player to move.
+    """
+    side = 0 if game.player(x, o) == mnk.X else 1
+    own, other = (x, o) if side == 0 else (o, x)
+    return own, other, game.hash(x, o), side
+
+
+def serial_best(game, x, o, depth):
+    """
+    Returns (cell, score, nodes) from a serial fixed-depth search.
+    """
+    search = fixed_depth_search(game)
+    score, cell = search.root(*root_state(game, x, o), depth)
+    return cell, score, search.nodes
+
+
+class ParallelSearch():
+
+    def __init__(self, game, workers):
+        self.game = game
+        self.alpha = multiprocessing.Value("q", -mnk.WIN - 1)
+        self.pool = multiprocessing.Pool(
+            workers, init_worker, (game.m, game.n, game.k, self.alpha)
+        )
+
+    def best(self, x, o, depth):
+        """
+        Returns (cell, score, nodes) from a root-split search to `depth`.
+        """
+        own, other, h, side = root_state(self.game, x, o)
+        self.alpha.value = -mnk.WIN - 1
+        tasks = [
+            (own, other, h, side, cell, depth)
+            for cell in self.game.actions(x, o)
+        ]
+        order = {cell: i for i, cell in enumerate(self.game.actions(x, o))}
+
+        best = None
+        nodes = 0
+        for cell, value, alpha, count in self.pool.imap_unordered(search_move, tasks):
+            nodes += count
+            if value <= alpha:
+                continue
+            if best is None or (value, -order[cell]) > (best[1], -order[best[0]]):
+                best = (cell, value)
+        return best[0], best[1], nodes
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+
+def random_positions(game, count, moves, seed=0):
+    """
+    Returns `count` positions reached by `moves` random moves each.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        x, o = game.initial_state()
+        for _ in range(moves):
+            x, o = game.result(x, o, rng.choice(game.actions(x, o)))
+        if not game.terminal(x, o):
+            positions.append((x, o))
+    return positions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare serial and root-split search.")
+    parser.add_argument("shape", nargs="*", type=int, default=[5, 5, 4, 6],
+                        help="m n k depth (default: 5 5 4 6)")
+    parser.add_argument("--positions", type=int, default=POSITIONS)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, multiprocessing.cpu_count()}))
+    args = parser.parse_args()
+    if len(args.shape) != 4:
+        parser.error("expected m n k depth")
+    m, n, k, depth = args.shape
+
+    game = mnk.Game(m, n, k)
+    positions = random_positions(game, args.positions, OPENING_MOVES)
+    print(f"{m}x{n}, {k} in a row, depth {depth}, {len(positions)} positions, "
+          f"{multiprocessing.cpu_count()} cores")
+
+    start = time.perf_counter()
+    expected = []
+    nodes = 0
+    for x, o in positions:
+        _, score, count = serial_best(game, x, o, depth)
+        expected.append(score)
+        nodes += count
+    baseline = time.perf_counter() - start
+    print(f"  {'serial':<12} {baseline:.2f} s, {nodes} nodes")
+
+    for workers in args.workers:
+        search = ParallelSearch(game, workers)
+        try:
+            # Let every worker start before timing
+            search.best(*positions[0], 1)
+            start = time.perf_counter()
+            nodes = 0
+            mismatches = 0
+            for (x, o), score in zip(positions, expected):
+                _, value, count = search.best(x, o, depth)
+                nodes += count
+                mismatches += value != score
+            elapsed = time.perf_counter() - start
+        finally:
+            search.close()
+        print(f"  {f'{workers} workers':<12} {elapsed:.2f} s, {nodes} nodes, "
+              f"{baseline / elapsed:.2f}x, {mismatches} score mismatches")
+
+
+if __name__ == "__main__":
+    main()
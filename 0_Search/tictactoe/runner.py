@@ -1,5 +1,6 @@
 import pygame
 import sys
+import threading
 import time
 
 import tictactoe as ttt
@@ -16,10 +17,36 @@ screen = pygame.display.set_mode(size)
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+smallFont = pygame.font.Font("OpenSans-Regular.ttf", 16)
+
+# Shortest time the computer appears to think, so its move can be followed
+MIN_THINK = 0.5
+
+
+def think(board, out):
+    """
+    Computes the AI move on a worker thread, storing the move, whether
+    the opening book answered it, the positions searched and the seconds
+    taken in `out`.
+    """
+    moves = ttt.book_moves
+    nodes = ttt.search_nodes()
+    start = time.perf_counter()
+    move = ttt.minimax(board)
+    elapsed = time.perf_counter() - start
+    out["book"] = ttt.book_moves > moves
+    out["nodes"] = ttt.search_nodes() - nodes
+    out["elapsed"] = elapsed
+    time.sleep(max(0, MIN_THINK - elapsed))
+    out["move"] = move
+
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
+ai_thread = None
+ai_result = None
+ai_started = None
+last_move_stats = None
 
 while True:
 
@@ -108,15 +135,37 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, computed without blocking the event loop
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
+            if ai_thread is None:
+                ai_result = {}
+                ai_started = time.perf_counter()
+                ai_thread = threading.Thread(
+                    target=think, args=(board, ai_result), daemon=True
+                )
+                ai_thread.start()
+            elif not ai_thread.is_alive():
+                board = ttt.result(board, ai_result["move"])
+                last_move_stats = ai_result
+                ai_thread = None
+
+        # Draw search instrumentation
+        if ai_thread is not None:
+            lines = ["Thinking", f"{time.perf_counter() - ai_started:.1f} s"]
+        elif last_move_stats is not None:
+            if last_move_stats["book"]:
+                source = "Opening book"
             else:
-                ai_turn = True
+                source = f"Search, {last_move_stats['nodes']} nodes"
+            lines = ["Last AI move", source,
+                     f"{1000 * last_move_stats['elapsed']:.2f} ms"]
+        else:
+            lines = []
+        for k, line in enumerate(reversed(lines)):
+            overlay = smallFont.render(line, True, white)
+            overlayRect = overlay.get_rect()
+            overlayRect.bottomleft = (10, height - 10 - 20 * k)
+            screen.blit(overlay, overlayRect)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -141,6 +190,6 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    last_move_stats = None
 
     pygame.display.flip()
@@ -0,0 +1,186 @@
+"""
+Headless self-play harness for the tictactoe engines.
+
+Plays games through the tictactoe module API, with no pygame: each
+engine against itself and against a random player, taking turns as X
+and O. Every engine move is timed, its search nodes are counted, and its
+value is checked against the opening book, so a move that throws away a
+win or a draw is reported even when the random opponent fails to punish
+it. Several backends are compared in one report.
+
+Usage: python selfplay.py [--games N] [--backends NAME ...] [--seed N]
+"""
+
+import argparse
+import random
+import time
+
+import bitboard
+import book
+import mnk
+import tictactoe as ttt
+from benchmark import baseline_minimax
+
+GAMES = 1000
+PERCENTILES = (50, 90, 99)
+
+# Every position solved, to check moves against; solved now if book.py
+# has not been run
+solved = book.Book(book.read() or book.solve())
+
+
+def counted(choose, nodes):
+    """
+    Returns a move function reporting the search nodes of each move,
+    given a function returning a running node count.
+    """
+    def move(board):
+        before = nodes()
+        action = choose(board)
+        return action, nodes() - before
+    return move
+
+
+def mnk_move(board):
+    action = mnk.minimax(board)
+    return action, mnk.searches[3, 3, 3].nodes
+
+
+def baseline_move(board):
+    return baseline_minimax(board), None
+
+
+# name -> (move function returning (action, nodes), reset before each game)
+BACKENDS = {
+    "book": (counted(ttt.minimax, ttt.search_nodes), None),
+    "bitboard": (counted(bitboard.minimax, lambda: bitboard.nodes_searched),
+                 bitboard.transpositions.clear),
+    "list": (counted(ttt.list_minimax, lambda: ttt.nodes_searched),
+             ttt.transpositions.clear),
+    "mnk": (mnk_move, mnk.searches.clear),
+    "baseline": (baseline_move, None)
+}
+DEFAULT_BACKENDS = ("book", "bitboard", "list", "mnk")
+
+
+def value(board):
+    """
+    Returns the perfect-play value of a board, 1 if X wins.
+    """
+    return solved.lookup(*bitboard.from_board(board))[0]
+
+
+class Record():
+    """
+    Per-move and per-game statistics for one backend.
+    """
+
+    def __init__(self):
+        self.latencies = []
+        self.nodes = []
+        self.suboptimal = 0
+        self.outcomes = {}
+
+    def outcome(self, opponent, score):
+        wins, draws, losses = self.outcomes.get(opponent, (0, 0, 0))
+        self.outcomes[opponent] = (
+            wins + (score > 0), draws + (score == 0), losses + (score < 0)
+        )
+
+    def percentile(self, p):
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, len(ordered) * p // 100)]
+
+
+def engine_move(move, board, record):
+    start = time.perf_counter()
+    action, nodes = move(board)
+    record.latencies.append(time.perf_counter() - start)
+    if nodes is not None:
+        record.nodes.append(nodes)
+
+    after = ttt.result(board, action)
+    if value(after) != value(board):
+        record.suboptimal += 1
+    return after
+
+
+def play(x_player, o_player):
+    """
+    Plays one game where each player is a function from board to next
+    board. Returns the utility of the final board.
+    """
+    board = ttt.initial_state()
+    while not ttt.terminal(board):
+        move = x_player if ttt.player(board) == ttt.X else o_player
+        board = move(board)
+    return ttt.utility(board)
+
+
+def run(name, games, rng):
+    """
+    Plays `games` games of the named backend against a random player and
+    `games` against itself, returning its Record.
+    """
+    move, reset = BACKENDS[name]
+    record = Record()
+
+    def engine(board):
+        return engine_move(move, board, record)
+
+    def random_player(board):
+        return ttt.result(board, rng.choice(sorted(ttt.actions(board))))
+
+    for game in range(games):
+        if reset is not None:
+            reset()
+        if game % 2 == 0:
+            record.outcome("random", play(engine, random_player))
+        else:
+            record.outcome("random", -play(random_player, engine))
+
+    for game in range(games):
+        if reset is not None:
+            reset()
+        record.outcome("self", play(engine, engine))
+    return record
+
+
+def report(name, record):
+    moves = len(record.latencies)
+    print(f"{name}: {moves} moves, {record.suboptimal} suboptimal")
+    for opponent, (wins, draws, losses) in record.outcomes.items():
+        flag = "" if losses == 0 else "  LOST GAMES"
+        if opponent == "self" and wins + losses:
+            flag = "  DECISIVE SELF-PLAY"
+        print(f"  vs {opponent:<8} {wins} won, {draws} drawn, {losses} lost{flag}")
+    if record.nodes:
+        print(f"  nodes/move    mean {sum(record.nodes) / len(record.nodes):.1f}, "
+              f"max {max(record.nodes)}")
+    percentiles = ", ".join(
+        f"p{p} {1000 * record.percentile(p):.3f}" for p in PERCENTILES
+    )
+    print(f"  latency ms    {percentiles}, max {1000 * max(record.latencies):.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Self-play tictactoe engines.")
+    parser.add_argument("--games", type=int, default=GAMES,
+                        help="games per opponent for each backend")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS,
+                        default=DEFAULT_BACKENDS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for name in args.backends:
+        start = time.perf_counter()
+        moves = ttt.book_moves
+        record = run(name, args.games, random.Random(args.seed))
+        if name == "book" and ttt.book_moves == moves:
+            name = "book (no book found, searched)"
+        report(name, record)
+        print(f"  total         {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,19 @@ Tic Tac Toe Player
 
 import math
 
+import bitboard
+import book
+
 X = "X"
 O = "O"
 EMPTY = None
 
+# Opening book written by book.py, read on the first call to minimax
+opening_book = None
+
+# Moves answered by the opening book so far
+book_moves = 0
+
 
 def initial_state():
     """
@@ -198,40 +207,135 @@ def min_value(board):
     return v  
 
 
-def minimax(board):
-    """
-    Returns the optimal action for the current player on the board.
-    """
-    
-    if terminal(board):
-        return None
+# Rotations and reflections of the board, as permutations of cells 0-8
+SYMMETRIES = [
+    (0, 1, 2, 3, 4, 5, 6, 7, 8), (6, 3, 0, 7, 4, 1, 8, 5, 2),
+    (8, 7, 6, 5, 4, 3, 2, 1, 0), (2, 5, 8, 1, 4, 7, 0, 3, 6),
+    (2, 1, 0, 5, 4, 3, 8, 7, 6), (0, 3, 6, 1, 4, 7, 2, 5, 8),
+    (6, 7, 8, 3, 4, 5, 0, 1, 2), (8, 5, 2, 7, 4, 1, 6, 3, 0)
+]
 
-    player_turn = player(board)
+# Transposition table entry flags: the stored value is exact, or only a
+# lower or upper bound because the search that produced it was cut off
+EXACT = 0
+LOWER = 1
+UPPER = 2
 
-    if player_turn == "X":
+# Canonical board key -> (value, flag), shared by every search in a game
+transpositions = {}
 
-        highest_value = -99999
-        pick_action = None
-        for action in actions(board):
+# Number of positions expanded by alphabeta, for benchmarking
+nodes_searched = 0
 
-            if min_value(result(board,action)) > highest_value:
-                highest_value = min_value(result(board,action))
-                pick_action = action
 
-        return pick_action   
+def canonical(board):
+    """
+    Returns a key shared by the board and its 7 rotations and reflections.
+    """
+    cells = "".join(cell or "." for row in board for cell in row)
+    return min("".join(cells[k] for k in symmetry) for symmetry in SYMMETRIES)
+
 
-    
-    if player_turn == "O":
+def alphabeta(board, alpha, beta):
+    """
+    Returns the minimax value of the board, or a bound on it outside the
+    window (alpha, beta). Each position's result is stored under its
+    canonical key, so symmetric and transposed positions are searched once.
+    """
+    global nodes_searched
+
+    key = canonical(board)
+    entry = transpositions.get(key)
+    if entry is not None:
+        value, flag = entry
+        if flag == EXACT:
+            return value
+        if flag == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value
+
+    nodes_searched += 1
+    if terminal(board):
+        value = utility(board)
+        transpositions[key] = (value, EXACT)
+        return value
+
+    low, high = alpha, beta
+    if player(board) == X:
+        value = -math.inf
+        for action in sorted(actions(board)):
+            value = max(value, alphabeta(result(board, action), alpha, beta))
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+    else:
+        value = math.inf
+        for action in sorted(actions(board)):
+            value = min(value, alphabeta(result(board, action), alpha, beta))
+            beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+    # A bound at the edge of the utility range is as good as exact
+    if value <= low and value != -1:
+        transpositions[key] = (value, UPPER)
+    elif value >= high and value != 1:
+        transpositions[key] = (value, LOWER)
+    else:
+        transpositions[key] = (value, EXACT)
+    return value
 
-        smallest_value = 99999
-        pick_action = None
-        for action in actions(board):
 
-            if max_value(result(board,action)) < smallest_value:
-                smallest_value = max_value(result(board,action))
-                pick_action = action
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board,
+    from the opening book if it has the position, else by searching.
+    """
+    global opening_book, book_moves
+    if opening_book is None:
+        opening_book = book.load()
+    try:
+        action = opening_book.minimax(board)
+    except KeyError:
+        return bitboard.minimax(board)
+    book_moves += 1
+    return action
+
+
+def search_nodes():
+    """
+    Returns the number of positions expanded by every search so far.
+    Opening book lookups expand none.
+    """
+    return nodes_searched + bitboard.nodes_searched
 
-        return pick_action       
 
+def list_minimax(board):
+    """
+    Returns the optimal action for the current player, searching the
+    list board directly.
+    """
+
+    if terminal(board):
+        return None
 
+    # Each child is searched once, with a window narrowed by the best so far
+    alpha, beta = -math.inf, math.inf
+    pick_action = None
+    if player(board) == X:
+        for action in sorted(actions(board)):
+            value = alphabeta(result(board, action), alpha, beta)
+            if value > alpha:
+                alpha = value
+                pick_action = action
+    else:
+        for action in sorted(actions(board)):
+            value = alphabeta(result(board, action), alpha, beta)
+            if value < beta:
+                beta = value
+                pick_action = action
 
+    return pick_action
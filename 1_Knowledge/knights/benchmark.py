@@ -0,0 +1,196 @@
+"""
+Benchmarks for the entailment engines on knights puzzles.
+
+Checks that every engine agrees with model_check on the puzzles in
+puzzle.py, measures how fast each way of evaluating a sentence runs,
+then times the engines on generated islands of knights and knaves,
+where engines enumerating models only run while 2^n stays affordable,
+along with the time and memory taken to build each island.
+The truth-table engine evaluates whole chunks of models per operation,
+so it is run on islands too large for the other enumerating engines.
+Finally, asking about every symbol with one sat.KnowledgeBase is timed
+against a fresh solver per query.
+
+Usage: python benchmark.py [islanders ...]
+"""
+
+import itertools
+import random
+import sys
+import time
+import tracemalloc
+
+import compiled
+import puzzle
+import sat
+from logic import And, Biconditional, Implication, Not, Or, Symbol, model_check
+
+# Largest symbol count for which engines enumerating one model at a time are run
+ENUMERATION_LIMIT = 16
+
+# name -> (entailment check, largest symbol count it is run on, if limited)
+ENGINES = {
+    "model_check": (model_check, ENUMERATION_LIMIT),
+    "compiled": (compiled.model_check, ENUMERATION_LIMIT),
+    "truth table": (compiled.truth_table_check, compiled.TRUTH_TABLE_LIMIT),
+    "sat": (sat.entails, None)
+}
+
+
+def island(n, seed=0):
+    """
+    Returns (knowledge, symbols) for a puzzle about `n` >= 2 islanders, each
+    a knight or a knave, where every islander makes one statement about
+    others that is true exactly when the speaker is a knight.
+    """
+    rng = random.Random(seed)
+    knights = [Symbol(f"{i} is a Knight") for i in range(n)]
+    knaves = [Symbol(f"{i} is a Knave") for i in range(n)]
+    kinds = [rng.random() < 0.5 for _ in range(n)]
+
+    knowledge = And()
+    for i in range(n):
+        knowledge.add(Or(knights[i], knaves[i]))
+        knowledge.add(Not(And(knights[i], knaves[i])))
+
+    for i in range(n):
+        others = [p for p in range(n) if p != i]
+        j, k = rng.choice(others), rng.choice(others)
+        form = rng.randrange(3)
+        if form == 0:
+            # "j is a knave"
+            statement = knaves[j]
+            truth = not kinds[j]
+        elif form == 1:
+            # "j and k are the same kind"
+            statement = Biconditional(knights[j], knights[k])
+            truth = kinds[j] == kinds[k]
+        else:
+            # "if j is a knight then so is k"
+            statement = Implication(knights[j], knights[k])
+            truth = not kinds[j] or kinds[k]
+
+        # Knights only say true things, so the statement fits the kinds
+        if truth != kinds[i]:
+            statement = Not(statement)
+        knowledge.add(Implication(knights[i], statement))
+        knowledge.add(Implication(knaves[i], Not(statement)))
+
+    return knowledge, knights + knaves
+
+
+def construction(n):
+    """
+    Returns the seconds taken to build island(n) and the bytes its
+    sentences occupy, traced on a second build so tracing does not slow
+    the timed one.
+    """
+    start = time.perf_counter()
+    island(n)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    knowledge = island(n)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, size
+
+
+def timed(check, knowledge, symbols):
+    start = time.perf_counter()
+    results = [check(knowledge, symbol) for symbol in symbols]
+    return results, time.perf_counter() - start
+
+
+def incremental(knowledge, symbols):
+    """
+    Returns the results and time of asking about every symbol with one
+    KnowledgeBase, which keeps its solver between queries.
+    """
+    start = time.perf_counter()
+    base = sat.KnowledgeBase(knowledge)
+    results = [base.entails(symbol) for symbol in symbols]
+    return results, time.perf_counter() - start
+
+
+def evaluation_rate(evaluate, models, seconds=1):
+    """
+    Returns evaluations per second of `evaluate` cycling through `models`.
+    """
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        for model in models:
+            evaluate(model)
+        count += len(models)
+    return count / (time.perf_counter() - start)
+
+
+def compare_evaluation(number, knowledge):
+    """
+    Prints evaluations per second of a puzzle's knowledge base as a
+    Sentence tree and as a compiled program.
+    """
+    program = compiled.Program(knowledge)
+    assignments = list(itertools.product((0, 1), repeat=len(program.symbols)))
+    dicts = [dict(zip(program.symbols, model)) for model in assignments]
+    bytearrays = [bytearray(model) for model in assignments]
+
+    tree = evaluation_rate(knowledge.evaluate, dicts)
+    generated = evaluation_rate(program.evaluate, bytearrays)
+    print(f"  puzzle {number}: {len(program.instructions)} instructions, "
+          f"tree {tree / 1000:.0f}k/s, compiled {generated / 1000:.0f}k/s "
+          f"({generated / tree:.1f}x)")
+
+
+def main():
+    symbols = [puzzle.AKnight, puzzle.AKnave, puzzle.BKnight,
+               puzzle.BKnave, puzzle.CKnight, puzzle.CKnave]
+    puzzles = [puzzle.knowledge0, puzzle.knowledge1,
+               puzzle.knowledge2, puzzle.knowledge3]
+
+    print("Puzzles:")
+    for number, knowledge in enumerate(puzzles):
+        expected, _ = timed(model_check, knowledge, symbols)
+        line = f"  puzzle {number}:"
+        for name, (check, _) in ENGINES.items():
+            results, elapsed = timed(check, knowledge, symbols)
+            agree = "" if results == expected else " DISAGREES"
+            line += f" {name} {1000 * elapsed:.2f} ms{agree},"
+        print(line.rstrip(","))
+
+    print("Evaluations per second:")
+    for number, knowledge in enumerate(puzzles):
+        compare_evaluation(number, knowledge)
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or [4, 8, 10, 12, 100, 250]
+    print("Generated islands:")
+    for n in sizes:
+        built, size = construction(n)
+        knowledge, people = island(n)
+        line = (f"  {n} islanders, {2 * n} symbols: built in {1000 * built:.1f} ms, "
+                f"{size / 1024:.0f} KB,")
+        expected = None
+        for name, (check, limit) in ENGINES.items():
+            if limit is not None and 2 * n > limit:
+                continue
+            results, elapsed = timed(check, knowledge, people)
+            expected = expected or results
+            agree = "" if results == expected else " DISAGREES"
+            line += f" {name} {1000 * elapsed:.1f} ms{agree},"
+        print(f"{line} {sum(expected)} entailed")
+
+    print("Incremental queries, one solver per query against one KnowledgeBase:")
+    cases = [(f"puzzle {number}", knowledge, symbols)
+             for number, knowledge in enumerate(puzzles)]
+    cases += [(f"{n} islanders", *island(n)) for n in sizes]
+    for name, knowledge, people in cases:
+        expected, fresh = timed(sat.entails, knowledge, people)
+        results, elapsed = incremental(knowledge, people)
+        agree = "" if results == expected else " DISAGREES"
+        print(f"  {name}: {len(people)} queries, {1000 * fresh:.1f} ms, "
+              f"incremental {1000 * elapsed:.1f} ms ({fresh / elapsed:.1f}x){agree}")
+
+
+if __name__ == "__main__":
+    main()
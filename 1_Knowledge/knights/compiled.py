@@ -0,0 +1,197 @@
+"""
+Compiled evaluation of logical sentences.
+
+A sentence is flattened into straight-line code over integer registers:
+registers 0 to n - 1 hold the symbols in the order of `symbols`, and
+each instruction (op, a, b) computes one new register from earlier
+ones. Identical sub-sentences are compiled once, and every operand is
+evaluated once, Biconditional included. Models are bytearrays, or any
+sequence of 0/1 integers, indexed like `symbols`.
+
+The code is run as a generated Python function, one assignment per
+instruction, with no interpreter loop. Values are combined with bitwise
+operators and negated by XOR with `ones`, so the function works on
+single truth values with ones = 1 and, with ones = 2^w - 1, on w models
+at once where each symbol is a w-bit column.
+"""
+
+import itertools
+from array import array
+
+import logic
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Opcodes
+TRUE = 0
+FALSE = 1
+NOT = 2
+AND = 3
+OR = 4
+IMPLIES = 5
+IFF = 6
+
+# Models evaluated together: each chunk holds 2^CHUNK_BITS models
+CHUNK_BITS = 16
+
+# Above this many symbols truth tables are too large, and
+# truth_table_check falls back to logic.model_check
+TRUTH_TABLE_LIMIT = 24
+
+OPERATORS = {
+    TRUE: "ones",
+    FALSE: "0",
+    NOT: "{a} ^ ones",
+    AND: "{a} & {b}",
+    OR: "{a} | {b}",
+    IMPLIES: "({a} ^ ones) | {b}",
+    IFF: "{a} ^ {b} ^ ones"
+}
+
+
+class Program():
+
+    def __init__(self, sentence, symbols=None):
+        """
+        Compiles `sentence`, with registers for `symbols` in the given
+        order if given, else for its own symbols in sorted order.
+        """
+        self.symbols = sorted(sentence.symbols()) if symbols is None else list(symbols)
+        self.registers = {name: i for i, name in enumerate(self.symbols)}
+        self.code = array("i")
+        self.compiled = {}
+        self.result = self.emit(sentence)
+        self.instructions = [
+            tuple(self.code[i:i + 3]) for i in range(0, len(self.code), 3)
+        ]
+        self._function = None
+
+    def emit(self, sentence):
+        """
+        Appends the code computing `sentence` and returns its register.
+        """
+        if isinstance(sentence, Symbol):
+            try:
+                return self.registers[sentence.name]
+            except KeyError:
+                raise Exception(f"variable {sentence.name} not in model")
+
+        if sentence in self.compiled:
+            return self.compiled[sentence]
+
+        if isinstance(sentence, Not):
+            register = self.instruction(NOT, self.emit(sentence.operand))
+        elif isinstance(sentence, (And, Or)):
+            if isinstance(sentence, And):
+                op, empty, parts = AND, TRUE, sentence.conjuncts
+            else:
+                op, empty, parts = OR, FALSE, sentence.disjuncts
+            if not parts:
+                register = self.instruction(empty)
+            else:
+                register = self.emit(parts[0])
+                for part in parts[1:]:
+                    register = self.instruction(op, register, self.emit(part))
+        elif isinstance(sentence, Implication):
+            register = self.instruction(
+                IMPLIES, self.emit(sentence.antecedent), self.emit(sentence.consequent)
+            )
+        elif isinstance(sentence, Biconditional):
+            register = self.instruction(
+                IFF, self.emit(sentence.left), self.emit(sentence.right)
+            )
+        else:
+            raise TypeError(f"cannot compile {sentence!r}")
+
+        self.compiled[sentence] = register
+        return register
+
+    def instruction(self, op, a=0, b=0):
+        self.code.extend((op, a, b))
+        return len(self.symbols) + len(self.code) // 3 - 1
+
+    def evaluate(self, model):
+        """
+        Returns the sentence's truth value in `model`, running the
+        generated function.
+        """
+        return bool(self.function()(model))
+
+    def source(self):
+        """
+        Returns Python source for a function of (model, ones) computing
+        the sentence, one assignment per instruction.
+        """
+        lines = ["def program(model, ones=1):"]
+        lines.extend(
+            f"    r{i} = model[{i}]" for i in range(len(self.symbols))
+        )
+        for i, (op, a, b) in enumerate(self.instructions):
+            expression = OPERATORS[op].format(a=f"r{a}", b=f"r{b}")
+            lines.append(f"    r{len(self.symbols) + i} = {expression}")
+        lines.append(f"    return r{self.result}")
+        return "\n".join(lines)
+
+    def function(self):
+        """
+        Returns the generated function, compiled on first use.
+        """
+        if self._function is None:
+            namespace = {}
+            exec(self.source(), namespace)
+            self._function = namespace["program"]
+        return self._function
+
+
+def model_check(knowledge, query):
+    """
+    Checks if knowledge base entails query, evaluating compiled programs
+    on every model.
+    """
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    knowledge = Program(knowledge, symbols).function()
+    query = Program(query, symbols).function()
+    for model in itertools.product((0, 1), repeat=len(symbols)):
+        if knowledge(model) and not query(model):
+            return False
+    return True
+
+
+def column(i, width):
+    """
+    Returns the `width`-bit truth-table column of symbol `i` among the
+    low symbols of a chunk: bit k is set when bit i of k is set.
+    """
+    span = 1 << i
+    pattern = ((1 << span) - 1) << span
+    period = 2 * span
+    while period < width:
+        pattern |= pattern << period
+        period *= 2
+    return pattern
+
+
+def truth_table_check(knowledge, query):
+    """
+    Checks if knowledge base entails query by evaluating every model at
+    once, 2^CHUNK_BITS at a time. Each symbol is a column of bits, one
+    per model, and the compiled knowledge base and negated query combine
+    whole columns with single integer operations. The first CHUNK_BITS
+    symbols vary within a chunk and the rest are constant across it,
+    so memory stays bounded however many chunks there are.
+    """
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    n = len(symbols)
+    if n > TRUTH_TABLE_LIMIT:
+        return logic.model_check(knowledge, query)
+
+    counterexample = Program(And(knowledge, Not(query)), symbols).function()
+    bits = min(n, CHUNK_BITS)
+    width = 1 << bits
+    ones = (1 << width) - 1
+    low = [column(i, width) for i in range(bits)]
+    for chunk in range(1 << (n - bits)):
+        high = [ones if chunk >> i & 1 else 0 for i in range(n - bits)]
+        if counterexample(low + high, ones):
+            return False
+    return True
+
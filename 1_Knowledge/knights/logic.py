@@ -1,7 +1,23 @@
-import itertools
+import weakref
 
 
 class Sentence():
+    """
+    Sentences other than And are immutable and interned: constructing a
+    sentence equal to one that exists returns the existing object, so
+    identical sub-sentences share one node. Hashes and symbol sets are
+    cached. An And is built up with add() and becomes frozen when it is
+    first hashed, which happens when it is made part of another sentence
+    or used as a key, so no interned sentence can change under its
+    parents. Pickling stores only the constructor arguments, so a loaded
+    sentence is interned and hashed again in the loading process.
+    """
+
+    __slots__ = ("__weakref__", "_hash", "_symbols")
+
+    # Weak references to interned sentences, used as their own keys: a
+    # reference hashes and compares like its sentence while it is alive
+    interned = {}
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -13,13 +29,35 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return frozenset()
 
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
             raise TypeError("must be a logical sentence")
 
+    def intern(self, value):
+        """
+        Returns the interned sentence equal to this new one, whose hash is
+        `value`.
+        """
+        self._hash = value
+        self._symbols = None
+        ref = weakref.ref(self, Sentence.forget)
+        existing = Sentence.interned.setdefault(ref, ref)()
+        return self if existing is None else existing
+
+    @staticmethod
+    def forget(ref):
+        Sentence.interned.pop(ref, None)
+
+    @classmethod
+    def union(cls, sentence, parts):
+        """Returns the symbols of `parts`, cached in `sentence`."""
+        if sentence._symbols is None:
+            sentence._symbols = frozenset().union(*[part.symbols() for part in parts])
+        return sentence._symbols
+
     @classmethod
     def parenthesize(cls, s):
         """Parenthesizes an expression if not already parenthesized."""
@@ -44,14 +82,21 @@ class Sentence():
 
 class Symbol(Sentence):
 
-    def __init__(self, name):
-        self.name = name
+    __slots__ = ("name",)
+
+    def __new__(cls, name):
+        symbol = object.__new__(cls)
+        symbol.name = name
+        return symbol.intern(hash(("symbol", name)))
+
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
     def __eq__(self, other):
         return isinstance(other, Symbol) and self.name == other.name
 
     def __hash__(self):
-        return hash(("symbol", self.name))
+        return self._hash
 
     def __repr__(self):
         return self.name
@@ -66,19 +111,31 @@ class Symbol(Sentence):
         return self.name
 
     def symbols(self):
-        return {self.name}
+        if self._symbols is None:
+            self._symbols = frozenset((self.name,))
+        return self._symbols
 
 
 class Not(Sentence):
-    def __init__(self, operand):
+
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
         Sentence.validate(operand)
-        self.operand = operand
+        sentence = object.__new__(cls)
+        sentence.operand = operand
+        return sentence.intern(hash(("not", hash(operand))))
+
+    def __reduce__(self):
+        return (Not, (self.operand,))
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        return self is other or (
+            isinstance(other, Not) and self.operand == other.operand
+        )
 
     def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        return self._hash
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -94,18 +151,31 @@ class Not(Sentence):
 
 
 class And(Sentence):
+
+    __slots__ = ("conjuncts",)
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
         self.conjuncts = list(conjuncts)
+        self._hash = None
+        self._symbols = None
+
+    def __reduce__(self):
+        return (And, tuple(self.conjuncts))
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return self is other or (
+            isinstance(other, And) and self.conjuncts == other.conjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        # Hashing freezes the And, as its hash must not change afterwards
+        if self._hash is None:
+            self._hash = hash(
+                ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
+            )
+        return self._hash
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -115,10 +185,16 @@ class And(Sentence):
 
     def add(self, conjunct):
         Sentence.validate(conjunct)
+        if self._hash is not None:
+            raise Exception(f"cannot add to {self!r}, which is already in use")
         self.conjuncts.append(conjunct)
+        self._symbols = None
 
     def evaluate(self, model):
-        return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
+        for conjunct in self.conjuncts:
+            if not conjunct.evaluate(model):
+                return False
+        return True
 
     def formula(self):
         if len(self.conjuncts) == 1:
@@ -127,29 +203,41 @@ class And(Sentence):
                            for conjunct in self.conjuncts])
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        return Sentence.union(self, self.conjuncts)
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+        value = hash(("or", tuple(hash(disjunct) for disjunct in disjuncts)))
+        sentence = object.__new__(cls)
+        sentence.disjuncts = disjuncts
+        return sentence.intern(value)
+
+    def __reduce__(self):
+        return (Or, self.disjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return self is other or (
+            isinstance(other, Or) and self.disjuncts == other.disjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        return self._hash
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
         return f"Or({disjuncts})"
 
     def evaluate(self, model):
-        return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
+        for disjunct in self.disjuncts:
+            if disjunct.evaluate(model):
+                return True
+        return False
 
     def formula(self):
         if len(self.disjuncts) == 1:
@@ -158,23 +246,33 @@ class Or(Sentence):
                             for disjunct in self.disjuncts])
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        return Sentence.union(self, self.disjuncts)
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        sentence = object.__new__(cls)
+        sentence.antecedent = antecedent
+        sentence.consequent = consequent
+        return sentence.intern(hash(("implies", hash(antecedent), hash(consequent))))
+
+    def __reduce__(self):
+        return (Implication, (self.antecedent, self.consequent))
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return self is other or (
+            isinstance(other, Implication)
+            and self.antecedent == other.antecedent
+            and self.consequent == other.consequent
+        )
 
     def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return self._hash
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -189,32 +287,39 @@ class Implication(Sentence):
         return f"{antecedent} => {consequent}"
 
     def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+        return Sentence.union(self, (self.antecedent, self.consequent))
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        sentence = object.__new__(cls)
+        sentence.left = left
+        sentence.right = right
+        return sentence.intern(hash(("biconditional", hash(left), hash(right))))
+
+    def __reduce__(self):
+        return (Biconditional, (self.left, self.right))
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return self is other or (
+            isinstance(other, Biconditional)
+            and self.left == other.left
+            and self.right == other.right
+        )
 
     def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return self._hash
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
 
     def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+        return self.left.evaluate(model) == self.right.evaluate(model)
 
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
@@ -222,7 +327,7 @@ class Biconditional(Sentence):
         return f"{left} <=> {right}"
 
     def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+        return Sentence.union(self, (self.left, self.right))
 
 
 def model_check(knowledge, query):
@@ -257,7 +362,7 @@ def model_check(knowledge, query):
                     check_all(knowledge, query, remaining, model_false))
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = set(knowledge.symbols() | query.symbols())
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
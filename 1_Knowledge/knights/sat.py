@@ -0,0 +1,491 @@
+"""
+Entailment by satisfiability, as an alternative to logic.model_check.
+
+Sentences are compiled to conjunctive normal form with the Tseitin
+encoding: every compound sub-sentence gets a fresh variable constrained
+to equal it, so the clauses grow linearly with the sentence instead of
+exponentially. KB entails query exactly when KB ∧ ¬query has no model,
+which a conflict-driven clause-learning (CDCL) solver decides without
+enumerating assignments: unit propagation over two watched literals
+per clause, learning a first-UIP clause from each conflict, activity-
+based branching and restarts.
+
+Variables are positive integers and literals are signed variables, as
+in the DIMACS format.
+
+A KnowledgeBase keeps one solver across queries, solving each under
+assumptions, so that encodings and learned clauses are reused.
+"""
+
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Conflicts before the first restart, and the growth of the limit
+RESTART_FIRST = 100
+RESTART_GROWTH = 1.5
+
+# Variable activity decays by this factor after each conflict
+ACTIVITY_DECAY = 0.95
+
+
+class Solver():
+
+    def __init__(self):
+        self.clauses = []
+        self.learnts = []
+        self.watches = {}
+        self.ok = True
+
+        # Indexed by variable; index 0 is unused
+        self.values = [0]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.polarity = [False]
+
+        self.trail = []
+        self.trail_limits = []
+        self.head = 0
+        self.order = []
+        self.increment = 1.0
+        self.model = None
+
+    def new_var(self):
+        """
+        Returns a new variable.
+        """
+        self.values.append(0)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.activity.append(0.0)
+        self.polarity.append(False)
+        var = len(self.values) - 1
+        self.watches[var] = []
+        self.watches[-var] = []
+        heapq.heappush(self.order, (0.0, var))
+        return var
+
+    def value(self, literal):
+        """
+        Returns 1 if the literal is true, -1 if false and 0 if unassigned.
+        """
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def add_clause(self, literals):
+        """
+        Adds the disjunction of `literals`. Returns False if the clauses
+        have become unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self.cancel_until(0)
+
+        clause = []
+        for literal in set(literals):
+            if -literal in literals or self.value(literal) == 1:
+                return True
+            if self.value(literal) == 0:
+                clause.append(literal)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.enqueue(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.clauses.append(clause)
+            self.watch(clause)
+        return self.ok
+
+    def watch(self, clause):
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def enqueue(self, literal, reason):
+        var = abs(literal)
+        self.values[var] = 1 if literal > 0 else -1
+        self.levels[var] = len(self.trail_limits)
+        self.reasons[var] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal forced by unit clauses. Returns a conflicting
+        clause, or None.
+
+        Each clause watches its first two literals. A clause is only
+        visited when one of them becomes false, and then either finds
+        another non-false literal to watch or forces its other watch.
+        """
+        values = self.values
+        while self.head < len(self.trail):
+            false_literal = -self.trail[self.head]
+            self.head += 1
+            watchers = self.watches[false_literal]
+            self.watches[false_literal] = kept = []
+            for i, clause in enumerate(watchers):
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                first = clause[0]
+                first_value = values[abs(first)] if first > 0 else -values[abs(first)]
+                if first_value == 1:
+                    kept.append(clause)
+                    continue
+
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    if (values[abs(literal)] if literal > 0 else -values[abs(literal)]) != -1:
+                        clause[1], clause[k] = literal, false_literal
+                        self.watches[literal].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if first_value == -1:
+                        kept.extend(watchers[i + 1:])
+                        self.head = len(self.trail)
+                        return clause
+                    self.enqueue(first, clause)
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the first-UIP clause learned from a conflict, with its
+        asserting literal first, and the level to backjump to.
+        """
+        level = len(self.trail_limits)
+        seen = set()
+        learnt = [None]
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = conflict
+        while True:
+            for q in (clause if literal is None else clause[1:]):
+                var = abs(q)
+                if var not in seen and self.levels[var] > 0:
+                    seen.add(var)
+                    self.bump(var)
+                    if self.levels[var] == level:
+                        pending += 1
+                    else:
+                        learnt.append(q)
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reasons[abs(literal)]
+        learnt[0] = -literal
+
+        backjump = 0
+        if len(learnt) > 1:
+            best = max(range(1, len(learnt)), key=lambda i: self.levels[abs(learnt[i])])
+            learnt[1], learnt[best] = learnt[best], learnt[1]
+            backjump = self.levels[abs(learnt[1])]
+        return learnt, backjump
+
+    def bump(self, var):
+        self.activity[var] += self.increment
+        if self.activity[var] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+            self.order = [(-self.activity[v], v) for v in range(1, len(self.values))]
+            heapq.heapify(self.order)
+        else:
+            heapq.heappush(self.order, (-self.activity[var], var))
+
+    def cancel_until(self, level):
+        """
+        Undoes every assignment above decision level `level`.
+        """
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            var = abs(literal)
+            self.polarity[var] = literal > 0
+            self.values[var] = 0
+            self.reasons[var] = None
+            heapq.heappush(self.order, (-self.activity[var], var))
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.head = len(self.trail)
+
+    def pick_branch(self):
+        """
+        Returns the unassigned variable with the highest activity, or None.
+        """
+        while self.order:
+            activity, var = heapq.heappop(self.order)
+            if self.values[var] == 0 and -activity == self.activity[var]:
+                return var
+        for var in range(1, len(self.values)):
+            if self.values[var] == 0:
+                return var
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True and sets `model` to a satisfying assignment of every
+        variable if the clauses are satisfiable with every literal in
+        `assumptions` true, else returns False.
+
+        Assumptions are the first decisions, one decision level each, so
+        clauses learned under them follow from the clauses alone and stay
+        valid for later calls with other assumptions.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        self.cancel_until(0)
+        if self.propagate() is not None:
+            self.ok = False
+            return False
+
+        conflicts = 0
+        limit = RESTART_FIRST
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.trail_limits:
+                    self.ok = False
+                    return False
+                learnt, backjump = self.analyze(conflict)
+                self.cancel_until(backjump)
+                if len(learnt) == 1:
+                    self.enqueue(learnt[0], None)
+                else:
+                    self.learnts.append(learnt)
+                    self.watch(learnt)
+                    self.enqueue(learnt[0], learnt)
+                self.increment /= ACTIVITY_DECAY
+
+                conflicts += 1
+                if conflicts >= limit:
+                    conflicts = 0
+                    limit *= RESTART_GROWTH
+                    self.cancel_until(0)
+                continue
+
+            level = len(self.trail_limits)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.value(literal)
+                if value == -1:
+                    self.cancel_until(0)
+                    return False
+
+                # An assumption already true still gets its own level
+                self.trail_limits.append(len(self.trail))
+                if value == 0:
+                    self.enqueue(literal, None)
+                continue
+
+            var = self.pick_branch()
+            if var is None:
+                self.model = [value == 1 for value in self.values]
+                self.cancel_until(0)
+                return True
+            self.trail_limits.append(len(self.trail))
+            self.enqueue(var if self.polarity[var] else -var, None)
+
+
+class Encoder():
+    """
+    Tseitin encoding of Sentences into a Solver's clauses. Symbols and
+    sub-sentences keep their variables across calls, so sentences sharing
+    structure share clauses.
+    """
+
+    def __init__(self, solver):
+        self.solver = solver
+        self.variables = {}
+        self.literals = {}
+
+    def var(self, name):
+        """
+        Returns the variable for the symbol called `name`.
+        """
+        if name not in self.variables:
+            self.variables[name] = self.solver.new_var()
+        return self.variables[name]
+
+    def literal(self, sentence):
+        """
+        Returns a literal equal in every model to `sentence`.
+        """
+        if isinstance(sentence, Symbol):
+            return self.var(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+
+        if sentence in self.literals:
+            return self.literals[sentence]
+
+        add = self.solver.add_clause
+        if isinstance(sentence, (And, Or)):
+            parts = sentence.conjuncts if isinstance(sentence, And) else sentence.disjuncts
+            children = [self.literal(part) for part in parts]
+            v = self.solver.new_var()
+            if isinstance(sentence, Or):
+                v, children = -v, [-child for child in children]
+
+            # v is the conjunction of children (for Or, by De Morgan)
+            for child in children:
+                add([-v, child])
+            add([v] + [-child for child in children])
+            v = abs(v)
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            v = self.solver.new_var()
+            add([-v, -a, b])
+            add([v, a])
+            add([v, -b])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            v = self.solver.new_var()
+            add([-v, -a, b])
+            add([-v, a, -b])
+            add([v, a, b])
+            add([v, -a, -b])
+        else:
+            raise TypeError(f"cannot encode {sentence!r}")
+
+        self.literals[sentence] = v
+        return v
+
+    def assert_sentence(self, sentence):
+        """
+        Adds clauses requiring `sentence` to be true. Conjunctions and
+        disjunctions at the top level, and negations pushed through
+        them, become clauses directly, without Tseitin variables.
+        """
+        for clause in self.top_level(sentence, True):
+            self.solver.add_clause(clause)
+
+    def top_level(self, sentence, positive):
+        """
+        Yields clauses requiring `sentence` to be true, or false if not
+        `positive`.
+        """
+        if isinstance(sentence, Not):
+            yield from self.top_level(sentence.operand, not positive)
+        elif isinstance(sentence, And) and positive:
+            for conjunct in sentence.conjuncts:
+                yield from self.top_level(conjunct, True)
+        elif isinstance(sentence, Or) and not positive:
+            for disjunct in sentence.disjuncts:
+                yield from self.top_level(disjunct, False)
+        elif isinstance(sentence, Implication) and not positive:
+            yield from self.top_level(sentence.antecedent, True)
+            yield from self.top_level(sentence.consequent, False)
+        elif isinstance(sentence, Or):
+            yield [self.literal(disjunct) for disjunct in sentence.disjuncts]
+        elif isinstance(sentence, And):
+            yield [-self.literal(conjunct) for conjunct in sentence.conjuncts]
+        elif isinstance(sentence, Implication):
+            yield [-self.literal(sentence.antecedent), self.literal(sentence.consequent)]
+        else:
+            literal = self.literal(sentence)
+            yield [literal if positive else -literal]
+
+
+class KnowledgeBase():
+    """
+    A knowledge base answering many queries with one solver.
+
+    Each query is solved under the assumption that it is false, instead
+    of as a new problem, so the encoding of the knowledge, the clauses
+    learned by earlier queries and the variable activities carry over.
+    Models found along the way are kept, and a query false in one of
+    them is answered without solving. Sentences added after push() are
+    retracted by the matching pop(): they are guarded by a selector
+    variable that is assumed true until the pop makes it false.
+    """
+
+    def __init__(self, *sentences):
+        self.solver = Solver()
+        self.encoder = Encoder(self.solver)
+        self.scopes = []
+        self.models = []
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """
+        Adds `sentence` to the knowledge, within the innermost scope.
+        """
+        self.models = []
+        if not self.scopes:
+            self.encoder.assert_sentence(sentence)
+            return
+        selector = self.scopes[-1]
+        for clause in self.encoder.top_level(sentence, True):
+            self.solver.add_clause([-selector] + clause)
+
+    def push(self):
+        """
+        Opens a scope for sentences to be retracted by pop().
+        """
+        self.scopes.append(self.solver.new_var())
+
+    def pop(self):
+        """
+        Retracts every sentence added since the matching push().
+        """
+        selector = self.scopes.pop()
+        self.solver.add_clause([-selector])
+
+    def satisfiable(self):
+        """
+        Checks if the knowledge has a model.
+        """
+        return bool(self.models) or self.solve([])
+
+    def entails(self, query):
+        """
+        Checks if the knowledge entails `query`.
+        """
+        literal = self.encoder.literal(query)
+        var = abs(literal)
+        for model in self.models:
+            if var < len(model) and model[var] != (literal > 0):
+                return False
+        return not self.solve([-literal])
+
+    def solve(self, assumptions):
+        if not self.solver.solve(self.scopes + assumptions):
+            return False
+        self.models.append(self.solver.model)
+        return True
+
+
+def satisfiable(sentence):
+    """
+    Returns a model of `sentence` as a dictionary from symbol name to
+    truth value, or None if it has no model.
+    """
+    solver = Solver()
+    encoder = Encoder(solver)
+    encoder.assert_sentence(sentence)
+    if not solver.solve():
+        return None
+    return {name: solver.model[var] for name, var in encoder.variables.items()}
+
+
+def entails(knowledge, query):
+    """
+    Checks if knowledge base entails query, by showing that the
+    knowledge base and the negated query have no model together.
+    """
+    solver = Solver()
+    encoder = Encoder(solver)
+    encoder.assert_sentence(knowledge)
+    encoder.assert_sentence(Not(query))
+    return not solver.solve()